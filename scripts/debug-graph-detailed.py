@@ -6,107 +6,430 @@ import time
 import os
 import sys
 from datetime import datetime
-from collections import defaultdict
-import threading
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import argparse
+import array
+import importlib.util
+import queue
+import threading
+
+try:
+    import httpx
+except ImportError:  # fall back to the requests session for every call
+    httpx = None
+
+try:
+    import numpy as np
+except ImportError:  # analyze_performance falls back to plain Python
+    np = None
+
+try:
+    import orjson
+except ImportError:  # stdlib json is used instead
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # graph summaries are taken from the fully parsed body
+    ijson = None
+
+# Bodies that are not decoded are only logged up to this many bytes
+MAX_LOG_BYTES = 4096
+
+# Entries kept in memory; the full log is streamed to disk
+MAX_LOGS = 10_000
+
+# Retry policy shared by the requests adapter and the httpx client
+RETRY_TOTAL = 2
+RETRY_BACKOFF = 0.1
+RETRY_STATUSES = frozenset({502, 503, 504})
+
+# Console colours, pre-encoded for the log worker's byte writes
+_RED = b'\x1b[91m'
+_GREEN = b'\x1b[92m'
+_YELLOW = b'\x1b[93m'
+_BLUE = b'\x1b[94m'
+_MAGENTA = b'\x1b[95m'
+_CYAN = b'\x1b[96m'
+_RESET = b'\x1b[0m'
+
+_LOG_PREFIXES = {
+    "ERROR": _RED + b'[ERROR]' + _RESET + b' ',
+    "SUCCESS": _GREEN + b'[SUCCESS]' + _RESET + b' ',
+    "INFO": _BLUE + b'[INFO]' + _RESET + b' '
+}
 
 class GraphEndpointDebugger:
-    def __init__(self, base_url="http://localhost:3001", log_dir="logs/debug-harness"):
+    def __init__(self, base_url="http://localhost:3001", log_dir="logs/debug-harness", pool_size=10):
         self.base_url = base_url
         self.log_dir = log_dir
+        self.pool_size = pool_size
         self.session = requests.Session()
         self.session.headers.update({
             'Content-Type': 'application/json',
             'User-Agent': 'GraphDebugger/1.0'
         })
         
+        # Size the connection pool to the concurrency level so keep-alive
+        # connections are reused across workers instead of being discarded
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=RETRY_TOTAL, backoff_factor=RETRY_BACKOFF,
+                              status_forcelist=sorted(RETRY_STATUSES), raise_on_status=False)
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # Prefer a persistent HTTP/2 client for GET traffic when httpx is
+        # installed; HTTP/2 also needs the optional h2 package. The transport
+        # gets the same pool size and connect retries as the session adapter,
+        # and _h2_get retries the same statuses.
+        self.h2 = None
+        if httpx is not None:
+            transport = httpx.HTTPTransport(
+                http2=importlib.util.find_spec('h2') is not None,
+                limits=httpx.Limits(max_connections=pool_size,
+                                    max_keepalive_connections=pool_size,
+                                    keepalive_expiry=60),
+                retries=RETRY_TOTAL
+            )
+            self.h2 = httpx.Client(
+                base_url=base_url,
+                transport=transport,
+                timeout=30.0,
+                headers={
+                    'Content-Type': 'application/json',
+                    'User-Agent': 'GraphDebugger/1.0'
+                }
+            )
+        
+        # GET is the dominant call, so bind its transport once up front
+        self._get = self.session.get
+        self._send_get = self._h2_get if self.h2 is not None else self._session_get
+        
+        # Headers are fixed after setup, so snapshot them once for logging
+        self._headers_snapshot = dict(self.session.headers)
+        self._h2_headers_snapshot = dict(self.h2.headers) if self.h2 is not None else None
+        
         # Create log directory
         os.makedirs(log_dir, exist_ok=True)
         
         # Log file
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.log_file = os.path.join(log_dir, f"detailed_debug_{timestamp}.json")
-        self.logs = []
+        self.log_file = os.path.join(log_dir, f"detailed_debug_{timestamp}.jsonl")
+        self._log_fp = open(self.log_file, 'ab')
+        self.logs = deque(maxlen=MAX_LOGS)
+        
+        # Response times are recorded as requests complete so the analysis
+        # does not need to rescan the log
+        self._durations = array.array('d')
+        
+        # Logging happens on a background thread so request workers never
+        # contend on stdout while being timed
+        self._log_q = queue.Queue()
+        self._log_stop = object()
+        self._log_thread = threading.Thread(target=self._log_worker, daemon=True)
+        self._log_thread.start()
         
         # Test results
         self.results = defaultdict(list)
         
     def log(self, entry_type, data):
-        """Log entry to file and console"""
+        """Queue a log entry for the background log worker
+        
+        data may be a callable; it is only invoked by the worker so building
+        the payload stays off the caller's path.
+        """
+        self._log_q.put((entry_type, data, time.time()))
+    
+    def echo(self, text="", color=None):
+        """Queue a console line so it is written in order with log output"""
+        self._log_q.put((None, (text, color), None))
+    
+    def _log_worker(self):
+        """Drain queued entries into the log file and echo them to the console
+        
+        A failure on one entry is reported as plain text on sys.stdout and
+        the worker keeps draining, so later output is not lost.
+        """
+        out = sys.stdout.buffer
+        buf = bytearray()
+        while True:
+            item = self._log_q.get()
+            try:
+                if item is self._log_stop:
+                    self._flush_console(out, buf)
+                    return
+                mark = len(buf)
+                try:
+                    self._render_entry(item, buf)
+                except Exception as e:
+                    # Drop whatever the failed entry had appended and keep
+                    # the console in queue order
+                    del buf[mark:]
+                    self._flush_console(out, buf)
+                    self._log_fallback(item, e)
+                
+                # Only write out once the backlog is drained
+                if self._log_q.empty():
+                    self._flush_console(out, buf)
+            finally:
+                self._log_q.task_done()
+    
+    def _render_entry(self, item, buf):
+        """Write one queued entry to the log file and append its console line to buf"""
+        entry_type, data, timestamp = item
+        
+        # Plain console lines from echo()
+        if entry_type is None:
+            text, color = data
+            if color is not None:
+                # Keep leading blank lines outside the colour codes
+                body = text.lstrip('\n')
+                buf += b'\n' * (len(text) - len(body))
+                buf += color
+                buf += body.encode()
+                buf += _RESET
+            else:
+                buf += text.encode()
+            buf += b'\n'
+            return
+        
+        if callable(data):
+            data = data()
         entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.fromtimestamp(timestamp).isoformat(),
             "type": entry_type,
             "data": data
         }
+        line = orjson.dumps(entry) if orjson is not None else json.dumps(entry).encode()
         self.logs.append(entry)
+        self._log_fp.write(line)
+        self._log_fp.write(b'\n')
         
         # Console output
-        if entry_type == "ERROR":
-            print(f"\033[91m[{entry_type}]\033[0m {data.get('message', data)}")
-        elif entry_type == "SUCCESS":
-            print(f"\033[92m[{entry_type}]\033[0m {data.get('message', data)}")
-        elif entry_type == "INFO":
-            print(f"\033[94m[{entry_type}]\033[0m {data.get('message', data)}")
+        prefix = _LOG_PREFIXES.get(entry_type)
+        if prefix is not None:
+            buf += prefix
+            buf += str(data.get('message', data) if isinstance(data, dict) else data).encode()
         else:
-            print(f"[{entry_type}] {data}")
+            buf += f"[{entry_type}] {data}".encode()
+        buf += b'\n'
+    
+    def _flush_console(self, out, buf):
+        """Flush the log file and write the buffered console output"""
+        try:
+            self._log_fp.flush()
+            out.write(buf)
+            out.flush()
+        except Exception as e:
+            self._log_fallback(None, e)
+        finally:
+            buf.clear()
+    
+    def _log_fallback(self, item, error):
+        """Report an entry the worker could not handle as plain text"""
+        try:
+            if item is not None:
+                entry_type, data, _ = item
+                print(f"[{entry_type or 'ECHO'}] {data!r}", file=sys.stdout)
+            print(f"[LOG WORKER] {type(error).__name__}: {error}", file=sys.stdout, flush=True)
+        except Exception:
+            pass
     
     def save_logs(self):
-        """Save all logs to file"""
-        with open(self.log_file, 'w') as f:
-            json.dump(self.logs, f, indent=2)
-        print(f"\n\033[93mLogs saved to: {self.log_file}\033[0m")
+        """Stop the log worker and close the streamed log file"""
+        self.echo(f"\nLogs saved to: {self.log_file}", _YELLOW)
+        self._log_q.put(self._log_stop)
+        self._log_thread.join()
+        self._log_fp.close()
     
-    def make_request(self, endpoint, params=None, method="GET"):
-        """Make HTTP request with detailed logging"""
+    def make_request(self, endpoint, params=None, method="GET", parse_json=True, summarize=False,
+                     headers=None):
+        """Make HTTP request with detailed logging
+        
+        Returns (response, data, duration) where data is the decoded JSON body
+        of a 200 response when parse_json is set, otherwise None. With
+        summarize, data is the graph summary from _graph_summary instead and
+        the body is streamed through ijson when it is available.
+        """
         url = f"{self.base_url}{endpoint}"
+        use_h2 = self.h2 is not None and method == "GET"
         
-        request_data = {
+        snapshot = self._h2_headers_snapshot if use_h2 else self._headers_snapshot
+        self.log("REQUEST", lambda: {
             "url": url,
             "method": method,
             "params": params,
-            "headers": dict(self.session.headers)
-        }
-        
-        self.log("REQUEST", request_data)
+            "headers": {**snapshot, **headers} if headers else snapshot
+        })
         
-        start_time = time.time()
+        # Connection and TLS setup are only observable through httpx's trace
+        # hook; the requests transport reports TTFB and body time only
+        marks = {}
+        start = time.perf_counter_ns()
         try:
             if method == "GET":
-                response = self.session.get(url, params=params, timeout=30)
+                response = self._send_get(endpoint, params, headers, marks)
             else:
-                response = self.session.request(method, url, json=params, timeout=30)
+                response = self.session.request(method, url, json=params, headers=headers, timeout=30,
+                                                stream=True)
+            headers_at = time.perf_counter_ns()
+            
+            # Error bodies are only kept for the log, so read just a prefix
+            data = None
+            is_json = 'application/json' in response.headers.get('Content-Type', '')
+            try:
+                if response.status_code != 200:
+                    raw_body = self._read_prefix(response, use_h2, MAX_LOG_BYTES)
+                    body_size = len(raw_body)
+                elif summarize and ijson is not None and is_json:
+                    chunks = response.iter_bytes() if use_h2 else response.iter_content(65536)
+                    raw_body, body_size, data = self._stream_summary(chunks)
+                else:
+                    raw_body = response.read() if use_h2 else response.content
+                    body_size = len(raw_body)
+            finally:
+                response.close()
             
-            duration = (time.time() - start_time) * 1000  # Convert to ms
+            end = time.perf_counter_ns()
+            duration = (end - start) / 1e6
+            phases = {
+                "ttfb_ms": round((headers_at - start) / 1e6, 2),
+                "body_ms": round((end - headers_at) / 1e6, 2)
+            }
+            for phase, event in (("connect_ms", "connection.connect_tcp"), ("tls_ms", "connection.start_tls")):
+                if f"{event}.complete" in marks:
+                    phases[phase] = round((marks[f"{event}.complete"] - marks[f"{event}.started"]) / 1e6, 2)
             
             response_data = {
                 "status_code": response.status_code,
                 "duration_ms": round(duration, 2),
+                "phases": phases,
                 "headers": dict(response.headers),
-                "size_bytes": len(response.content)
+                "size_bytes": int(response.headers.get('Content-Length', body_size))
             }
             
-            try:
-                response_data["body"] = response.json()
-            except:
-                response_data["body"] = response.text[:1000]  # First 1000 chars if not JSON
+            if data is None and (parse_json or summarize) and response.status_code == 200 and is_json:
+                try:
+                    data = orjson.loads(raw_body) if orjson is not None else json.loads(raw_body)
+                except ValueError:
+                    pass
+                else:
+                    if summarize:
+                        data = self._graph_summary(data)
             
+            if data is not None:
+                response_data["body"] = data
+            else:
+                response_data["body"] = raw_body[:MAX_LOG_BYTES].decode('utf-8', errors='replace')
+            
+            self._durations.append(duration)
             self.log("RESPONSE", response_data)
             
-            return response, duration
+            return response, data, duration
             
         except Exception as e:
-            duration = (time.time() - start_time) * 1000
+            duration = (time.perf_counter_ns() - start) / 1e6
             error_data = {
                 "error": str(e),
                 "type": type(e).__name__,
                 "duration_ms": round(duration, 2)
             }
             self.log("ERROR", error_data)
-            return None, duration
+            return None, None, duration
+    
+    def _h2_get(self, endpoint, params, headers, marks):
+        """Stream a GET over the httpx client, recording trace events into marks
+        
+        Gateway errors are retried with the same backoff as the session's
+        urllib3 Retry policy.
+        """
+        request = self.h2.build_request(
+            "GET", endpoint, params=params, headers=headers,
+            extensions={"trace": lambda event, info: marks.setdefault(event, time.perf_counter_ns())}
+        )
+        for attempt in range(RETRY_TOTAL + 1):
+            response = self.h2.send(request, stream=True)
+            if response.status_code not in RETRY_STATUSES or attempt == RETRY_TOTAL:
+                return response
+            response.close()
+            # urllib3 retries the first failure immediately, then backs off
+            if attempt:
+                time.sleep(RETRY_BACKOFF * (2 ** attempt))
+    
+    def _session_get(self, endpoint, params, headers, marks):
+        """Stream a GET over the requests session"""
+        return self._get(self.base_url + endpoint, params=params, headers=headers, timeout=30, stream=True)
+    
+    def _read_prefix(self, response, use_h2, limit):
+        """Read at most `limit` bytes of a streamed response body"""
+        if not use_h2:
+            return response.raw.read(limit, decode_content=True)
+        
+        body = bytearray()
+        for chunk in response.iter_bytes():
+            body += chunk
+            if len(body) >= limit:
+                break
+        return bytes(body[:limit])
+    
+    def _stream_summary(self, chunks):
+        """Summarize a graph body with ijson while it streams in
+        
+        Returns (prefix, size, summary); only the first MAX_LOG_BYTES of the
+        body are kept and summary is None if the body is not valid JSON.
+        """
+        events = ijson.sendable_list()
+        parser = ijson.parse_coro(events)
+        prefix = bytearray()
+        size = 0
+        nodes = links = 0
+        node_ids = []
+        try:
+            for chunk in chunks:
+                size += len(chunk)
+                if len(prefix) < MAX_LOG_BYTES:
+                    prefix += chunk[:MAX_LOG_BYTES - len(prefix)]
+                parser.send(chunk)
+                for path, event, value in events:
+                    if event == "start_map":
+                        if path == "nodes.item":
+                            nodes += 1
+                        elif path == "links.item":
+                            links += 1
+                    elif path == "nodes.item.id":
+                        node_ids.append(value)
+                del events[:]
+            parser.close()
+        except ijson.JSONError:
+            return bytes(prefix), size, None
+        
+        return bytes(prefix), size, {"nodes": nodes, "links": links, "node_ids": node_ids}
+    
+    def _graph_summary(self, data):
+        """Reduce a decoded graph body to the counts and node IDs the tests compare"""
+        nodes = data.get("nodes", [])
+        return {
+            "nodes": len(nodes),
+            "links": len(data.get("links", [])),
+            "node_ids": [n.get("id") for n in nodes]
+        }
+    
+    def _send_all(self, requests_to_send, **kwargs):
+        """Send independent (endpoint, params) requests concurrently, returning results in order"""
+        with ThreadPoolExecutor(max_workers=min(len(requests_to_send), self.pool_size)) as executor:
+            futures = [executor.submit(self.make_request, endpoint, params, **kwargs)
+                       for endpoint, params in requests_to_send]
+            return [future.result() for future in futures]
     
     def test_basic_functionality(self):
         """Test basic graph endpoint functionality"""
-        print("\n\033[96m=== Testing Basic Functionality ===\033[0m")
+        self.echo("\n=== Testing Basic Functionality ===", _CYAN)
         
         test_address = "15KRsCq9LLNmCxNFhGk55s5bEyazKefunDxUH24GFZwsTxyu"
         
@@ -128,28 +451,30 @@ class GraphEndpointDebugger:
             })
         ]
         
-        for test_name, endpoint, params in tests:
-            print(f"\n\033[93mTest: {test_name}\033[0m")
-            response, duration = self.make_request(endpoint, params)
+        # The cases are independent, so send them together and report in order
+        results = self._send_all([(endpoint, params) for _, endpoint, params in tests],
+                                 summarize=True)
+        
+        for (test_name, _, _), (response, data, duration) in zip(tests, results):
+            self.echo(f"\nTest: {test_name}", _YELLOW)
             
-            if response and response.status_code == 200:
-                data = response.json()
-                nodes = len(data.get("nodes", []))
-                edges = len(data.get("links", []))
+            if response and response.status_code == 200 and data is not None:
+                nodes = data["nodes"]
+                edges = data["links"]
                 self.log("SUCCESS", {
                     "test": test_name,
                     "nodes": nodes,
                     "edges": edges,
                     "duration_ms": duration
                 })
-                print(f"  ✓ Nodes: {nodes}, Edges: {edges}, Time: {duration:.2f}ms")
+                self.echo(f"  ✓ Nodes: {nodes}, Edges: {edges}, Time: {duration:.2f}ms")
             else:
                 self.log("FAILURE", {"test": test_name})
-                print(f"  ✗ Failed")
+                self.echo(f"  ✗ Failed")
     
     def test_error_handling(self):
         """Test error handling and validation"""
-        print("\n\033[96m=== Testing Error Handling ===\033[0m")
+        self.echo("\n=== Testing Error Handling ===", _CYAN)
         
         error_tests = [
             ("Invalid address", "/api/graph/invalid-address", {}, 400),
@@ -158,51 +483,44 @@ class GraphEndpointDebugger:
             ("Non-existent endpoint", "/api/graph/foo/bar/baz", {}, 404)
         ]
         
-        for test_name, endpoint, params, expected_status in error_tests:
-            print(f"\n\033[93mTest: {test_name}\033[0m")
-            response, duration = self.make_request(endpoint, params)
+        results = self._send_all([(endpoint, params) for _, endpoint, params, _ in error_tests],
+                                 parse_json=False)
+        
+        for (test_name, _, _, expected_status), (response, _, duration) in zip(error_tests, results):
+            self.echo(f"\nTest: {test_name}", _YELLOW)
             
-            if response and response.status_code == expected_status:
+            if response is not None and response.status_code == expected_status:
                 self.log("SUCCESS", {"test": test_name, "expected_error": True})
-                print(f"  ✓ Got expected error status: {expected_status}")
+                self.echo(f"  ✓ Got expected error status: {expected_status}")
             else:
-                actual_status = response.status_code if response else "No response"
+                actual_status = response.status_code if response is not None else "No response"
                 self.log("FAILURE", {"test": test_name, "expected": expected_status, "actual": actual_status})
-                print(f"  ✗ Expected {expected_status}, got {actual_status}")
+                self.echo(f"  ✗ Expected {expected_status}, got {actual_status}")
     
     def test_concurrency(self, num_requests=10):
         """Test concurrent requests"""
-        print(f"\n\033[96m=== Testing Concurrency ({num_requests} requests) ===\033[0m")
+        self.echo(f"\n=== Testing Concurrency ({num_requests} requests) ===", _CYAN)
         
         test_address = "15KRsCq9LLNmCxNFhGk55s5bEyazKefunDxUH24GFZwsTxyu"
         endpoint = f"/api/graph/{test_address}"
         params = {"depth": 2, "maxNodes": 50}
         
-        results = []
-        threads = []
-        
         def make_concurrent_request(index):
-            response, duration = self.make_request(endpoint, params)
-            results.append({
+            response, _, duration = self.make_request(endpoint, params, parse_json=False)
+            return {
                 "index": index,
                 "success": response is not None and response.status_code == 200,
                 "duration": duration,
                 "status": response.status_code if response else None
-            })
-        
-        start_time = time.time()
+            }
         
-        # Start threads
-        for i in range(num_requests):
-            thread = threading.Thread(target=make_concurrent_request, args=(i,))
-            threads.append(thread)
-            thread.start()
+        start_time = time.perf_counter_ns()
         
-        # Wait for completion
-        for thread in threads:
-            thread.join()
+        with ThreadPoolExecutor(max_workers=num_requests) as executor:
+            futures = [executor.submit(make_concurrent_request, i) for i in range(num_requests)]
+            results = [future.result() for future in futures]
         
-        total_duration = (time.time() - start_time) * 1000
+        total_duration = (time.perf_counter_ns() - start_time) / 1e6
         
         # Analyze results
         successful = sum(1 for r in results if r["success"])
@@ -217,37 +535,48 @@ class GraphEndpointDebugger:
             "results": results
         })
         
-        print(f"\n  Total time: {total_duration:.2f}ms")
-        print(f"  Successful: {successful}/{num_requests}")
-        print(f"  Average response time: {avg_duration:.2f}ms")
+        self.echo(f"\n  Total time: {total_duration:.2f}ms")
+        self.echo(f"  Successful: {successful}/{num_requests}")
+        self.echo(f"  Average response time: {avg_duration:.2f}ms")
     
     def test_state_consistency(self, num_iterations=5):
         """Test if responses are consistent across multiple requests"""
-        print(f"\n\033[96m=== Testing State Consistency ({num_iterations} iterations) ===\033[0m")
+        self.echo(f"\n=== Testing State Consistency ({num_iterations} iterations) ===", _CYAN)
         
         test_address = "15KRsCq9LLNmCxNFhGk55s5bEyazKefunDxUH24GFZwsTxyu"
         endpoint = f"/api/graph/{test_address}"
         params = {"depth": 2, "maxNodes": 50}
         
         responses = []
+        validators = {}
         
+        # Requests go back to back; once the server hands out a validator an
+        # unchanged graph comes back as an empty 304
         for i in range(num_iterations):
-            print(f"\n\033[93mIteration {i+1}/{num_iterations}\033[0m")
-            response, duration = self.make_request(endpoint, params)
+            self.echo(f"\nIteration {i+1}/{num_iterations}", _YELLOW)
+            response, data, duration = self.make_request(endpoint, params, summarize=True,
+                                                         headers=validators)
             
-            if response and response.status_code == 200:
-                data = response.json()
+            if response is not None and response.status_code == 304 and responses:
+                response_summary = dict(responses[-1], iteration=i + 1, duration=duration)
+                responses.append(response_summary)
+                self.echo(f"  Not modified (304), Nodes: {response_summary['nodes']}, Edges: {response_summary['edges']}")
+            elif response and response.status_code == 200 and data is not None:
                 response_summary = {
                     "iteration": i + 1,
-                    "nodes": len(data.get("nodes", [])),
-                    "edges": len(data.get("links", [])),
-                    "node_ids": sorted([n.get("id") for n in data.get("nodes", [])]),
+                    "nodes": data["nodes"],
+                    "edges": data["links"],
+                    "node_ids": sorted(data["node_ids"]),
                     "duration": duration
                 }
                 responses.append(response_summary)
-                print(f"  Nodes: {response_summary['nodes']}, Edges: {response_summary['edges']}")
-            
-            time.sleep(1)  # Small delay between requests
+                self.echo(f"  Nodes: {response_summary['nodes']}, Edges: {response_summary['edges']}")
+                
+                validators = {}
+                if response.headers.get("ETag"):
+                    validators["If-None-Match"] = response.headers["ETag"]
+                if response.headers.get("Last-Modified"):
+                    validators["If-Modified-Since"] = response.headers["Last-Modified"]
         
         # Check consistency
         if len(responses) > 1:
@@ -265,17 +594,17 @@ class GraphEndpointDebugger:
                 "edge_counts": edge_counts
             })
             
-            print(f"\n  Node count consistency: {'✓' if consistent_nodes else '✗'}")
-            print(f"  Edge count consistency: {'✓' if consistent_edges else '✗'}")
+            self.echo(f"\n  Node count consistency: {'✓' if consistent_nodes else '✗'}")
+            self.echo(f"  Edge count consistency: {'✓' if consistent_edges else '✗'}")
             
             if not consistent_nodes or not consistent_edges:
-                print(f"  \033[91mWarning: Inconsistent results detected!\033[0m")
-                print(f"  Node counts: {node_counts}")
-                print(f"  Edge counts: {edge_counts}")
+                self.echo(f"  Warning: Inconsistent results detected!", _RED)
+                self.echo(f"  Node counts: {node_counts}")
+                self.echo(f"  Edge counts: {edge_counts}")
     
     def test_environment_impact(self):
         """Test impact of SKIP_BLOCKCHAIN environment variable"""
-        print("\n\033[96m=== Testing Environment Impact ===\033[0m")
+        self.echo("\n=== Testing Environment Impact ===", _CYAN)
         
         test_address = "15KRsCq9LLNmCxNFhGk55s5bEyazKefunDxUH24GFZwsTxyu"
         endpoint = f"/api/graph/{test_address}"
@@ -284,73 +613,82 @@ class GraphEndpointDebugger:
         # Note: This assumes the server respects the SKIP_BLOCKCHAIN env var
         # In a real test, you'd need to restart the server with different env settings
         
-        print("\n\033[93mNote: This test requires server restart with different SKIP_BLOCKCHAIN values\033[0m")
-        print("Current test will just make requests and log the data source from metadata")
+        self.echo("\nNote: This test requires server restart with different SKIP_BLOCKCHAIN values", _YELLOW)
+        self.echo("Current test will just make requests and log the data source from metadata")
         
-        response, duration = self.make_request(endpoint, params)
-        if response and response.status_code == 200:
-            data = response.json()
+        response, data, duration = self.make_request(endpoint, params)
+        if response and response.status_code == 200 and data is not None:
             metadata = data.get("metadata", {})
             data_source = metadata.get("dataSource", "unknown")
             
-            print(f"  Data source: {data_source}")
-            print(f"  Nodes: {len(data.get('nodes', []))}")
-            print(f"  Has blockchain data: {metadata.get('hasBlockchainData', 'unknown')}")
+            self.echo(f"  Data source: {data_source}")
+            self.echo(f"  Nodes: {len(data.get('nodes', []))}")
+            self.echo(f"  Has blockchain data: {metadata.get('hasBlockchainData', 'unknown')}")
     
     def analyze_performance(self):
         """Analyze performance metrics from all tests"""
-        print("\n\033[96m=== Performance Analysis ===\033[0m")
+        self.echo("\n=== Performance Analysis ===", _CYAN)
         
-        # Extract all response times from logs
-        response_times = []
-        for log in self.logs:
-            if log["type"] == "RESPONSE" and "duration_ms" in log["data"]:
-                response_times.append(log["data"]["duration_ms"])
+        if not self._durations:
+            return
         
-        if response_times:
+        if np is not None:
+            response_times = np.frombuffer(self._durations, dtype=np.float64)
+            avg_time = response_times.mean()
+            min_time = response_times.min()
+            max_time = response_times.max()
+            p50, p95, p99 = np.quantile(response_times, [0.5, 0.95, 0.99])
+            outliers = int(np.count_nonzero(response_times > avg_time * 2))
+        else:
+            response_times = sorted(self._durations)
             avg_time = sum(response_times) / len(response_times)
-            min_time = min(response_times)
-            max_time = max(response_times)
-            
-            print(f"\n  Total requests: {len(response_times)}")
-            print(f"  Average response time: {avg_time:.2f}ms")
-            print(f"  Min response time: {min_time:.2f}ms")
-            print(f"  Max response time: {max_time:.2f}ms")
-            
-            # Check for outliers
-            outlier_threshold = avg_time * 2
-            outliers = [t for t in response_times if t > outlier_threshold]
-            if outliers:
-                print(f"  \033[91mOutliers detected: {len(outliers)} requests took > {outlier_threshold:.2f}ms\033[0m")
+            min_time = response_times[0]
+            max_time = response_times[-1]
+            p50, p95, p99 = (response_times[min(int(q * len(response_times)), len(response_times) - 1)]
+                             for q in (0.5, 0.95, 0.99))
+            outliers = sum(1 for t in response_times if t > avg_time * 2)
+        
+        self.echo(f"\n  Total requests: {len(response_times)}")
+        self.echo(f"  Average response time: {avg_time:.2f}ms")
+        self.echo(f"  Min response time: {min_time:.2f}ms")
+        self.echo(f"  Max response time: {max_time:.2f}ms")
+        self.echo(f"  p50/p95/p99: {p50:.2f}ms / {p95:.2f}ms / {p99:.2f}ms")
+        
+        # Check for outliers
+        if outliers:
+            self.echo(f"  Outliers detected: {outliers} requests took > {avg_time * 2:.2f}ms", _RED)
     
-    def run_all_tests(self):
+    def run_all_tests(self, concurrency=10, consistency=5):
         """Run all test suites"""
-        print("\033[95m" + "="*50)
-        print("   GRAPH ENDPOINT DETAILED DEBUG HARNESS")
-        print("="*50 + "\033[0m")
-        print(f"API URL: {self.base_url}")
-        print(f"Started at: {datetime.now().isoformat()}")
+        self.echo("="*50, _MAGENTA)
+        self.echo("   GRAPH ENDPOINT DETAILED DEBUG HARNESS", _MAGENTA)
+        self.echo("="*50, _MAGENTA)
+        self.echo(f"API URL: {self.base_url}")
+        self.echo(f"Started at: {datetime.now().isoformat()}")
         
         # Check server health
-        print("\n\033[94mChecking server health...\033[0m")
-        response, _ = self.make_request("/api/health")
+        self.echo("\nChecking server health...", _BLUE)
+        response, _, _ = self.make_request("/api/health", parse_json=False)
         if not response or response.status_code != 200:
-            print("\033[91m✗ Server is not accessible!\033[0m")
+            self.echo("✗ Server is not accessible!", _RED)
+            self.save_logs()
             return
-        print("\033[92m✓ Server is running\033[0m")
+        self.echo("✓ Server is running", _GREEN)
         
         # Run test suites
         try:
             self.test_basic_functionality()
             self.test_error_handling()
-            self.test_concurrency()
-            self.test_state_consistency()
+            self.test_concurrency(concurrency)
+            self.test_state_consistency(consistency)
             self.test_environment_impact()
             self.analyze_performance()
         finally:
+            if self.h2 is not None:
+                self.h2.close()
+            self.echo("\nDebug harness completed!", _MAGENTA)
             # Save logs
             self.save_logs()
-            print("\n\033[95mDebug harness completed!\033[0m")
 
 def main():
     parser = argparse.ArgumentParser(description='Debug harness for graph endpoint')
@@ -360,8 +698,8 @@ def main():
     
     args = parser.parse_args()
     
-    debugger = GraphEndpointDebugger(base_url=args.url)
-    debugger.run_all_tests()
+    debugger = GraphEndpointDebugger(base_url=args.url, pool_size=args.concurrency)
+    debugger.run_all_tests(concurrency=args.concurrency, consistency=args.consistency)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -4,15 +4,124 @@ Security audit script for polkadot-analysis-tool
 Checks for vulnerabilities and security issues without npm audit
 """
 
+import bisect
 import json
+import mmap
 import os
 import re
 import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import orjson
+except ImportError:  # stdlib json is used instead
+    orjson = None
+
+try:
+    import ahocorasick
+except ImportError:  # fall back to one substring search per token
+    ahocorasick = None
+
+try:
+    import re2 as regex_engine  # google-re2: linear-time, no backtracking
+except ImportError:
+    regex_engine = re
+
+# Flags are scoped per pattern so the patterns can also be combined below.
+# Patterns are bytes so files can be matched straight from a memory map.
+SECRET_PATTERNS = [
+    (rb'(?i:(?:password|passwd|pwd)\s*[:=]\s*["\'][^"\']{8,}["\'])', 'Password'),
+    (rb'(?i:(?:secret|key|token)\s*[:=]\s*["\'][^"\']{20,}["\'])', 'Secret/Key'),
+    (rb'(?i:(?:api_key|apikey)\s*[:=]\s*["\'][^"\']{10,}["\'])', 'API Key'),
+    (rb'sk_[a-zA-Z0-9]{24,}', 'Private Key'),
+    (rb'pk_[a-zA-Z0-9]{24,}', 'Public Key'),
+    (rb'-----BEGIN [A-Z ]+-----[\s\S]*-----END [A-Z ]+-----', 'Certificate/Key'),
+]
+
+_SECRET_RES = [(regex_engine.compile(pattern), secret_type) for pattern, secret_type in SECRET_PATTERNS]
+
+# One pass over a file tells us whether any pattern can match at all. The
+# alternation alone would drop overlapping hits from different patterns, so
+# files that hit are rescanned with the individual patterns.
+_SECRET_PREFILTER = regex_engine.compile(b'|'.join(pattern for pattern, _ in SECRET_PATTERNS))
+
+_PLACEHOLDER_RE = re.compile(rb'example|placeholder|your_|change_|replace_', re.IGNORECASE)
+
+_NEWLINE_RE = re.compile(rb'\n')
+
+SCAN_EXTENSIONS = frozenset({'.js', '.json', '.env', '.config'})
+SKIP_DIRS = frozenset({'node_modules'})
+
+MIDDLEWARE_CHECKS = (
+    ('helmet()', 'Helmet security headers middleware'),
+    ('cors()', 'CORS middleware'),
+    ('rateLimiter', 'Rate limiting middleware'),
+    ('express.json()', 'JSON body parser'),
+    ('errorHandler', 'Error handling middleware')
+)
+
+VALIDATION_TOKENS = ('zod', 'validateAddress', 'sanitize', 'schema', 'validation')
+
+def _build_automaton(tokens):
+    """Build an Aho-Corasick automaton that finds all tokens in one pass"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for token in tokens:
+        automaton.add_word(token, token)
+    automaton.make_automaton()
+    return automaton
+
+_MIDDLEWARE_TOKENS = tuple(check for check, _ in MIDDLEWARE_CHECKS)
+_MIDDLEWARE_AUTOMATON = _build_automaton(_MIDDLEWARE_TOKENS)
+_VALIDATION_AUTOMATON = _build_automaton(VALIDATION_TOKENS)
+
+def _find_tokens(content, tokens, automaton):
+    """Return the set of tokens that occur in content"""
+    if automaton is None:
+        return {token for token in tokens if token in content}
+    return {token for _, token in automaton.iter(content)}
+
+def _rg_tokens(tokens, paths):
+    """Find fixed-string tokens across paths in one ripgrep run
+    
+    Returns a dict mapping each path to the set of tokens found in it, or
+    None when rg is not installed or fails so callers can fall back.
+    """
+    try:
+        result = subprocess.run(
+            ['rg', '--json', '--case-sensitive', '-F', '-f', '-', '--', *paths],
+            input='\n'.join(tokens), capture_output=True, text=True
+        )
+    except FileNotFoundError:
+        return None
+    
+    # Exit status 1 only means nothing matched
+    if result.returncode > 1:
+        return None
+    
+    found = {path: set() for path in paths}
+    for line in result.stdout.splitlines():
+        event = orjson.loads(line) if orjson is not None else json.loads(line)
+        if event['type'] != 'match':
+            continue
+        path = event['data']['path'].get('text')
+        for submatch in event['data']['submatches']:
+            found.setdefault(path, set()).add(submatch['match'].get('text'))
+    return found
+
+def _read_text(path):
+    """Read and decode a text file, ignoring undecodable bytes"""
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        return f.read()
 
 def read_package_json():
     """Read and parse package.json"""
     try:
+        if orjson is not None:
+            with open('package.json', 'rb') as f:
+                return orjson.loads(f.read())
         with open('package.json', 'r') as f:
             return json.load(f)
     except FileNotFoundError:
@@ -64,54 +173,79 @@ def check_dependency_versions():
     
     return vulnerabilities
 
-def scan_for_secrets():
-    """Scan for exposed secrets in code"""
-    secret_patterns = [
-        (r'(?i)(password|passwd|pwd)\s*[:=]\s*["\'][^"\']{8,}["\']', 'Password'),
-        (r'(?i)(secret|key|token)\s*[:=]\s*["\'][^"\']{20,}["\']', 'Secret/Key'),
-        (r'(?i)(api_key|apikey)\s*[:=]\s*["\'][^"\']{10,}["\']', 'API Key'),
-        (r'sk_[a-zA-Z0-9]{24,}', 'Private Key'),
-        (r'pk_[a-zA-Z0-9]{24,}', 'Public Key'),
-        (r'-----BEGIN [A-Z ]+-----[\s\S]*-----END [A-Z ]+-----', 'Certificate/Key'),
-    ]
+def _scan_one_file(file_path):
+    """Scan a single file for secrets; runs in a worker process"""
+    try:
+        with open(file_path, 'rb') as f:
+            # Empty files cannot be mapped and hold nothing to find
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as content:
+                return _match_secrets(file_path, content)
+    except Exception:
+        return []
+
+def _match_secrets(file_path, content):
+    """Match all secret patterns against a file's raw bytes"""
+    findings = []
+    if not _SECRET_PREFILTER.search(content):
+        return findings
     
-    secrets_found = []
+    # Newline offsets are collected once per file; each match then maps to
+    # its line with a binary search instead of recounting the prefix
+    newlines = None
+    
+    for secret_re, secret_type in _SECRET_RES:
+        for match in secret_re.finditer(content):
+            # Skip example/placeholder values
+            matched_text = match.group(0)
+            if _PLACEHOLDER_RE.search(matched_text):
+                continue
+            
+            if newlines is None:
+                newlines = [m.start() for m in _NEWLINE_RE.finditer(content)]
+            
+            matched_text = matched_text.decode('utf-8', errors='ignore')
+            findings.append({
+                'file': file_path,
+                'type': secret_type,
+                'line': bisect.bisect_left(newlines, match.start()) + 1,
+                'match': matched_text[:50] + '...' if len(matched_text) > 50 else matched_text
+            })
     
+    return findings
+
+def _walk(path, skip=SKIP_DIRS, exts=SCAN_EXTENSIONS):
+    """Yield scannable files under path, skipping hidden and excluded directories"""
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if not entry.name.startswith('.') and entry.name not in skip:
+                    yield from _walk(entry.path, skip, exts)
+            # Slice from the last dot rather than splitext so dotfiles such
+            # as '.env' keep their extension
+            elif entry.is_file() and entry.name[entry.name.rfind('.'):] in exts:
+                yield entry.path
+
+def scan_for_secrets():
+    """Scan for exposed secrets in code"""
     # Scan common directories
     scan_dirs = ['src', 'config', 'scripts', '.']
     
+    # '.' overlaps the other directories, so key files by their real path to
+    # scan each one only once
+    file_paths = {}
     for scan_dir in scan_dirs:
         if not os.path.exists(scan_dir):
             continue
-            
-        for root, dirs, files in os.walk(scan_dir):
-            # Skip node_modules and hidden directories
-            dirs[:] = [d for d in dirs if not d.startswith('.') and d != 'node_modules']
-            
-            for file in files:
-                if file.endswith(('.js', '.json', '.env', '.config')):
-                    file_path = os.path.join(root, file)
-                    try:
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
-                            
-                        for pattern, secret_type in secret_patterns:
-                            matches = re.finditer(pattern, content)
-                            for match in matches:
-                                # Skip example/placeholder values
-                                matched_text = match.group(0)
-                                if any(placeholder in matched_text.lower() for placeholder in 
-                                      ['example', 'placeholder', 'your_', 'change_', 'replace_']):
-                                    continue
-                                
-                                secrets_found.append({
-                                    'file': file_path,
-                                    'type': secret_type,
-                                    'line': content[:match.start()].count('\n') + 1,
-                                    'match': matched_text[:50] + '...' if len(matched_text) > 50 else matched_text
-                                })
-                    except Exception as e:
-                        continue
+        
+        for file_path in _walk(scan_dir):
+            file_paths.setdefault(os.path.realpath(file_path), file_path)
+    
+    secrets_found = []
+    with ProcessPoolExecutor() as executor:
+        for findings in executor.map(_scan_one_file, file_paths.values(), chunksize=32):
+            secrets_found.extend(findings)
     
     return secrets_found
 
@@ -121,19 +255,15 @@ def check_security_middleware():
     
     # Check main index.js for security middleware
     try:
-        with open('src/index.js', 'r') as f:
-            content = f.read()
-        
-        checks = [
-            ('helmet()', 'Helmet security headers middleware'),
-            ('cors()', 'CORS middleware'),
-            ('rateLimiter', 'Rate limiting middleware'),
-            ('express.json()', 'JSON body parser'),
-            ('errorHandler', 'Error handling middleware')
-        ]
+        found = _rg_tokens(_MIDDLEWARE_TOKENS, ['src/index.js'])
+        if found is not None:
+            found = found['src/index.js']
+        else:
+            content = _read_text('src/index.js')
+            found = _find_tokens(content, _MIDDLEWARE_TOKENS, _MIDDLEWARE_AUTOMATON)
         
-        for check, description in checks:
-            if check in content:
+        for check, description in MIDDLEWARE_CHECKS:
+            if check in found:
                 security_checks.append({
                     'check': description,
                     'status': 'PASS',
@@ -173,8 +303,7 @@ def check_env_files():
     
     # Check .gitignore
     if os.path.exists('.gitignore'):
-        with open('.gitignore', 'r') as f:
-            gitignore_content = f.read()
+        gitignore_content = _read_text('.gitignore')
         
         if '.env' not in gitignore_content:
             env_issues.append({
@@ -198,29 +327,24 @@ def check_input_validation():
         'src/api/routes/graph.js'
     ]
     
-    for file_path in key_files:
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, 'r') as f:
-                    content = f.read()
-                
-                validation_checks = [
-                    'zod',
-                    'validateAddress',
-                    'sanitize',
-                    'schema',
-                    'validation'
-                ]
-                
-                found_validations = [check for check in validation_checks if check in content]
-                
-                validation_files.append({
-                    'file': file_path,
-                    'validations_found': found_validations,
-                    'has_validation': len(found_validations) > 0
-                })
-            except Exception as e:
-                continue
+    existing_files = [file_path for file_path in key_files if os.path.exists(file_path)]
+    rg_found = _rg_tokens(VALIDATION_TOKENS, existing_files) if existing_files else None
+    
+    for file_path in existing_files:
+        try:
+            if rg_found is not None:
+                found = rg_found[file_path]
+            else:
+                found = _find_tokens(_read_text(file_path), VALIDATION_TOKENS, _VALIDATION_AUTOMATON)
+            found_validations = [check for check in VALIDATION_TOKENS if check in found]
+            
+            validation_files.append({
+                'file': file_path,
+                'validations_found': found_validations,
+                'has_validation': len(found_validations) > 0
+            })
+        except Exception as e:
+            continue
     
     return validation_files
 
@@ -9,8 +9,139 @@ import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 import networkx as nx
-from dataclasses import dataclass
+import scipy.sparse as sp
+from dataclasses import dataclass, replace
+import copy
 import json
+import math
+import threading
+import time
+from functools import lru_cache
+
+try:
+    from numba import njit
+except ImportError:  # the score kernel runs as plain numpy
+    njit = None
+
+try:
+    import igraph as ig
+except ImportError:  # network metrics are computed with networkx
+    ig = None
+
+try:
+    import orjson
+except ImportError:  # exports are written with json
+    orjson = None
+
+# Level of a round transfer amount (divisible by DOT units). The rounds
+# queries must use this exact expression to be served by idx_transfers_round.
+_ROUND_LEVEL_SQL = """
+    CASE
+        WHEN CAST(value AS INTEGER) % 100000000000000 = 0 THEN 3
+        WHEN CAST(value AS INTEGER) % 10000000000000 = 0 THEN 2
+        WHEN CAST(value AS INTEGER) % 1000000000000 = 0 THEN 1
+        ELSE 0
+    END
+"""
+
+# Persisted scores are reused until this old (seconds); pairs with transfers
+# in the last week go stale sooner. Changes to any other scoring input
+# invalidate them immediately through the score generation.
+SCORE_TTL_ACTIVE = 3600
+SCORE_TTL_IDLE = 86400
+
+# Rows of the raw per-pair input matrix passed to _score_kernel
+_SCORE_INPUTS = (
+    'has_relationship', 'has_transfers', 'transfer_count', 'total_volume', 'sender_balance',
+    'volume_percentile', 'avg_size_percentile', 'count_percentile',
+    'days_active', 'unique_days', 'days_since_last', 'relationship_days',
+    'transfers_last_week', 'transfers_last_month',
+    'common_connections', 'from_degree', 'to_degree', 'from_pagerank', 'to_pagerank',
+    'rapid_transfers', 'round_numbers', 'unusual_time_transfers', 'new_account_flag'
+)
+
+# Rows of the matrix returned by _score_kernel
+_SCORE_OUTPUTS = (
+    'volume_component', 'avg_size_component', 'relative_volume_component', 'volume_score',
+    'transfers_per_day', 'frequency_percentile', 'count_component', 'frequency_component',
+    'consistency_component', 'frequency_score',
+    'recency_component', 'duration_component', 'activity_component', 'temporal_score',
+    'avg_degree_centrality', 'avg_pagerank', 'common_connections_component',
+    'centrality_component', 'importance_component', 'network_score',
+    'rapid_transfer_risk', 'round_number_risk', 'time_anomaly_risk', 'new_account_risk', 'risk_score',
+    'base_score', 'risk_multiplier', 'total_score'
+)
+
+def _score_kernel(x):
+    """Compute every score component for a batch of pairs
+    
+    x has one row per _SCORE_INPUTS entry and one column per pair; the result
+    has one row per _SCORE_OUTPUTS entry. Components of a pair without the
+    data they need are zero, and total_score is left unrounded.
+    """
+    has_relationship = x[0] > 0.0
+    has_transfers = x[1] > 0.0
+    transfer_count = x[2]
+    total_volume = x[3]
+    sender_balance = x[4]
+    days_active = x[8]
+    days_since_last = x[10]
+    
+    out = np.zeros((28, x.shape[1]))
+    
+    # Volume
+    out[0] = np.minimum(40.0, x[5] * 40.0)
+    out[1] = np.minimum(30.0, x[6] * 30.0)
+    out[2] = np.where(sender_balance > 0.0,
+                      np.minimum(30.0, (total_volume / np.where(sender_balance > 0.0, sender_balance, 1.0)) * 100.0),
+                      15.0)
+    out[3] = np.where(has_relationship, np.minimum(100.0, out[0] + out[1] + out[2]), 0.0)
+    
+    # Frequency
+    out[4] = transfer_count / days_active
+    out[5] = np.minimum(1.0, out[4] / 10.0)
+    out[6] = np.minimum(40.0, x[7] * 40.0)
+    out[7] = np.minimum(30.0, out[5] * 30.0)
+    out[8] = np.minimum(30.0, (x[9] / days_active) * 30.0)
+    out[9] = np.where(has_relationship & has_transfers & (transfer_count != 0.0),
+                      np.minimum(100.0, out[6] + out[7] + out[8]), 0.0)
+    
+    # Temporal
+    out[10] = np.where(days_since_last <= 1.0, 40.0,
+              np.where(days_since_last <= 7.0, 35.0,
+              np.where(days_since_last <= 30.0, 25.0,
+              np.where(days_since_last <= 90.0, 15.0,
+              np.where(days_since_last <= 365.0, 5.0, 0.0)))))
+    out[11] = np.minimum(30.0, (x[11] / 365.0) * 30.0)
+    safe_count = np.maximum(transfer_count, 1.0)
+    out[12] = np.where(transfer_count > 0.0,
+                       np.minimum(30.0, (x[12] / safe_count) * 15.0 + (x[13] / safe_count) * 15.0), 0.0)
+    out[13] = np.where(has_relationship & has_transfers, out[10] + out[11] + out[12], 0.0)
+    
+    # Network
+    out[14] = (x[15] + x[16]) / 2.0
+    out[15] = (x[17] + x[18]) / 2.0
+    out[16] = np.minimum(40.0, x[14] * 5.0)
+    out[17] = np.minimum(30.0, out[14] * 100.0)
+    out[18] = np.minimum(30.0, out[15] * 1000.0)
+    out[19] = np.minimum(100.0, out[16] + out[17] + out[18])
+    
+    # Risk
+    out[20] = np.minimum(30.0, (x[19] / safe_count) * 100.0)
+    out[21] = np.minimum(25.0, (x[20] / safe_count) * 50.0)
+    out[22] = np.minimum(25.0, (x[21] / safe_count) * 50.0)
+    out[23] = x[22] * 20.0
+    out[24] = np.where(has_relationship, np.minimum(100.0, out[20] + out[21] + out[22] + out[23]), 0.0)
+    
+    # Weighted total with the risk penalty (max 50% reduction)
+    out[25] = out[3] * 0.25 + out[9] * 0.25 + out[13] * 0.20 + out[19] * 0.30
+    out[26] = 1.0 - (out[24] / 200.0)
+    out[27] = out[25] * out[26]
+    
+    return out
+
+if njit is not None:
+    _score_kernel = njit(cache=True)(_score_kernel)
 
 @dataclass
 class RelationshipScore:
@@ -25,373 +156,638 @@ class RelationshipScore:
     total_score: float
     details: Dict
 
+@lru_cache(maxsize=None)
+def _interpret_score_band(band: int) -> str:
+    """Interpretation text for a 20-point score band (1-5)"""
+    if band <= 1:
+        return "Very weak relationship (minimal interaction)"
+    elif band == 2:
+        return "Weak relationship (occasional interaction)"
+    elif band == 3:
+        return "Moderate relationship (regular interaction)"
+    elif band == 4:
+        return "Strong relationship (frequent, consistent interaction)"
+    else:
+        return "Very strong relationship (high volume, frequent, well-connected)"
+
 class RelationshipScorer:
     """Calculate relationship strength scores for Polkadot accounts"""
     
     def __init__(self, db_path: str):
         self.db_path = db_path
-        self.conn = sqlite3.connect(db_path)
-        self.conn.row_factory = sqlite3.Row
+        
+        # Reads go through one connection per thread so batch scoring can
+        # run concurrently under WAL. self.conn is the creating thread's
+        # connection; schema changes, score write-back and the
+        # data_version checks all use it.
+        self._tls = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self.conn = self._conn()
+        self._ensure_schema()
+        
+        # Sorted columns for percentile lookups, reloaded when another
+        # connection commits (PRAGMA data_version changes)
+        self._percentile_lock = threading.Lock()
+        self._percentile_version = None
+        self._rel_count = 0
+        self._vol_sorted = np.empty(0)
+        self._avg_size_sorted = np.empty(0)
+        self._tc_sorted = np.empty(0)
+        
+        # In-process memo of calculate_total_score(use_cache=True). The hour and
+        # PRAGMA data_version are part of the key, so entries expire hourly
+        # and on any commit from another connection.
+        self._memo_total_score = lru_cache(maxsize=4096)(self._cached_total_score)
+        self._score_cache_lock = threading.Lock()
+        self._score_cache_ready = False
+        
+        # Compile the score kernel up front rather than on the first pair
+        if njit is not None:
+            _score_kernel(np.ones((len(_SCORE_INPUTS), 1)))
         
     def __enter__(self):
         return self
         
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.conn.close()
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+            
+    def _conn(self) -> sqlite3.Connection:
+        """Connection owned by the calling thread"""
+        conn = getattr(self._tls, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+                isolation_level=None,
+                cached_statements=256
+            )
+            conn.row_factory = sqlite3.Row
+            self._configure_connection(conn)
+            self._tls.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+        
+    def _configure_connection(self, conn: sqlite3.Connection):
+        """Tune a connection for the read-heavy scoring workload"""
+        # WAL matches the API server's DatabaseService. page_size is left
+        # alone: it only takes effect on a new database or after VACUUM.
+        conn.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            PRAGMA cache_size = -262144;
+            PRAGMA mmap_size = 1073741824;
+            PRAGMA temp_store = MEMORY;
+            PRAGMA threads = 4;
+        """)
         
-    def calculate_volume_score(self, from_addr: str, to_addr: str) -> Tuple[float, Dict]:
-        """Calculate volume-based score (0-100)"""
+    def _ensure_schema(self):
+        """Create the indexes the scoring queries rely on"""
+        # total_volume is stored as TEXT, so the percentile ranks are served
+        # by expression indexes matching the casts used in the queries
+        self.conn.executescript("""
+            CREATE INDEX IF NOT EXISTS idx_ar_volume
+                ON account_relationships(CAST(total_volume AS REAL));
+            CREATE INDEX IF NOT EXISTS idx_ar_avg_size
+                ON account_relationships(CAST(total_volume AS REAL) / NULLIF(transfer_count, 0));
+            CREATE INDEX IF NOT EXISTS idx_ar_transfer_count
+                ON account_relationships(transfer_count);
+            CREATE INDEX IF NOT EXISTS idx_transfers_from_to_ts
+                ON transfers(from_address, to_address, timestamp);
+            CREATE INDEX IF NOT EXISTS idx_transfers_round
+                ON transfers(from_address, to_address, (""" + _ROUND_LEVEL_SQL + """));
+            CREATE INDEX IF NOT EXISTS idx_tx_night
+                ON transfers(from_address, to_address, timestamp)
+                WHERE CAST(strftime('%H', timestamp) AS INTEGER) BETWEEN 2 AND 5;
+        """)
+        
+    def _ensure_score_cache_schema(self):
+        """Create the score cache columns, table and triggers on first use
+        
+        Only use_cache needs them, so they are not created (and ingest
+        writes do not pay for the triggers) unless the cache is used.
+        """
+        with self._score_cache_lock:
+            if self._score_cache_ready:
+                return
+            # Persisted scores. The score columns match relationship_scoring.sql;
+            # score_details holds the JSON details. score_dirty is set by a
+            # trigger whenever a transfer lands on the pair and cleared when the
+            # scorer writes a fresh result.
+            columns = {row['name'] for row in self.conn.execute("PRAGMA table_xinfo(account_relationships)")}
+            for column, definition in (
+                ('volume_score', 'REAL DEFAULT 0.0'),
+                ('frequency_score', 'REAL DEFAULT 0.0'),
+                ('temporal_score', 'REAL DEFAULT 0.0'),
+                ('network_score', 'REAL DEFAULT 0.0'),
+                ('risk_score', 'REAL DEFAULT 0.0'),
+                ('total_score', 'REAL DEFAULT 0.0'),
+                ('score_updated_at', 'TIMESTAMP'),
+                ('score_dirty', 'INTEGER DEFAULT 1'),
+                ('score_details', 'TEXT'),
+                ('score_generation', 'INTEGER')
+            ):
+                if column not in columns:
+                    self.conn.execute(f"ALTER TABLE account_relationships ADD COLUMN {column} {definition}")
+            self.conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS mark_relationship_score_dirty
+                AFTER INSERT ON transfers
+                BEGIN
+                    UPDATE account_relationships
+                    SET score_dirty = 1
+                    WHERE from_address = NEW.from_address AND to_address = NEW.to_address;
+                END
+            """)
+        
+            # A pair's score also depends on every relationship (percentiles and
+            # common connections), both accounts and the network metrics. Any
+            # change to those bumps one global generation; a persisted score is
+            # only reused while its generation is current.
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS relationship_score_state (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    generation INTEGER NOT NULL DEFAULT 0
+                );
+                INSERT OR IGNORE INTO relationship_score_state (id, generation) VALUES (1, 0);
+            """)
+            for name, event in (
+                ('relationships_insert', 'INSERT ON account_relationships'),
+                ('relationships_delete', 'DELETE ON account_relationships'),
+                ('relationships_update', 'UPDATE OF total_volume, transfer_count, created_at ON account_relationships'),
+                ('accounts_insert', 'INSERT ON accounts'),
+                ('accounts_delete', 'DELETE ON accounts'),
+                ('accounts_update', 'UPDATE OF balance, created_at ON accounts'),
+                ('network_metrics_insert', 'INSERT ON account_network_metrics'),
+                ('network_metrics_delete', 'DELETE ON account_network_metrics'),
+                ('network_metrics_update', 'UPDATE ON account_network_metrics')
+            ):
+                self.conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS bump_score_generation_{name}
+                    AFTER {event}
+                    BEGIN
+                        UPDATE relationship_score_state SET generation = generation + 1 WHERE id = 1;
+                    END
+                """)
+            self._score_cache_ready = True
+        
+    def _refresh_percentile_cache(self):
+        """Load the sorted columns the percentile ranks are taken from"""
         cursor = self.conn.cursor()
         
-        # Get relationship data
+        cursor.execute("SELECT COUNT(*) FROM account_relationships")
+        self._rel_count = cursor.fetchone()[0]
+        
+        # Each ORDER BY is served by the matching index from _ensure_schema
         cursor.execute("""
-            SELECT 
-                ar.total_volume,
-                ar.transfer_count,
-                a1.balance as sender_balance,
-                a2.balance as receiver_balance
-            FROM account_relationships ar
-            LEFT JOIN accounts a1 ON ar.from_address = a1.address
-            LEFT JOIN accounts a2 ON ar.to_address = a2.address
-            WHERE ar.from_address = ? AND ar.to_address = ?
-        """, (from_addr, to_addr))
+            SELECT CAST(total_volume AS REAL) FROM account_relationships
+            WHERE CAST(total_volume AS REAL) IS NOT NULL
+            ORDER BY CAST(total_volume AS REAL)
+        """)
+        self._vol_sorted = np.fromiter((row[0] for row in cursor), dtype=np.float64)
         
-        row = cursor.fetchone()
-        if not row:
-            return 0.0, {}
-            
-        total_volume = float(row['total_volume'] or 0)
-        transfer_count = row['transfer_count'] or 0
-        sender_balance = float(row['sender_balance'] or 0)
+        cursor.execute("""
+            SELECT CAST(total_volume AS REAL) / NULLIF(transfer_count, 0) FROM account_relationships
+            WHERE CAST(total_volume AS REAL) / NULLIF(transfer_count, 0) IS NOT NULL
+            ORDER BY CAST(total_volume AS REAL) / NULLIF(transfer_count, 0)
+        """)
+        self._avg_size_sorted = np.fromiter((row[0] for row in cursor), dtype=np.float64)
         
-        # Calculate average transfer size
-        avg_transfer_size = total_volume / max(transfer_count, 1)
+        cursor.execute("""
+            SELECT transfer_count FROM account_relationships
+            WHERE transfer_count IS NOT NULL
+            ORDER BY transfer_count
+        """)
+        self._tc_sorted = np.fromiter((row[0] for row in cursor), dtype=np.float64)
+        
+    def _ensure_percentile_cache(self):
+        """Reload the percentile cache if the relationships may have changed"""
+        with self._percentile_lock:
+            version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != self._percentile_version:
+                self._refresh_percentile_cache()
+                self._percentile_version = version
+        
+    @staticmethod
+    def _cutoffs() -> Dict[str, int]:
+        """Epoch-second cutoffs for the recent-activity windows"""
+        now_ts = int(time.time())
+        return {'week_ts': now_ts - 7 * 86400, 'month_ts': now_ts - 30 * 86400}
+        
+    def _fetch_pair_stats(self, from_addr: str, to_addr: str) -> Dict:
+        """Fetch every aggregate the component scores need
+        
+        The relationship and transfer aggregates come from one statement;
+        the two accounts and their network metrics are each read with one
+        IN lookup on the address key.
+        """
+        cursor = self._conn().cursor()
         
-        # Get percentiles
         cursor.execute("""
+            WITH rel AS (
+                SELECT 
+                    ar.total_volume,
+                    ar.transfer_count,
+                    CAST(strftime('%s', ar.created_at) AS INTEGER) as created_epoch,
+                    COALESCE(CAST(ar.total_volume AS REAL), 0) as volume
+                FROM account_relationships ar
+                WHERE ar.from_address = :from_addr AND ar.to_address = :to_addr
+            ),
+            pair_ts AS (
+                SELECT 
+                    timestamp,
+                    CAST(strftime('%s', timestamp) AS INTEGER) as ts
+                FROM transfers
+                WHERE from_address = :from_addr AND to_address = :to_addr
+            ),
+            pair_tx AS (
+                SELECT 
+                    timestamp,
+                    ts,
+                    ts - LAG(ts) OVER (ORDER BY timestamp) as gap
+                FROM pair_ts
+            ),
+            tx AS (
+                SELECT 
+                    COUNT(*) as tx_count,
+                    MIN(ts) as first_epoch,
+                    MAX(ts) as last_epoch,
+                    COUNT(DISTINCT ts / 86400) as unique_days,
+                    COUNT(CASE WHEN ts >= :week_ts THEN 1 END) as transfers_last_week,
+                    COUNT(CASE WHEN ts >= :month_ts THEN 1 END) as transfers_last_month,
+                    COUNT(CASE WHEN gap < 300 THEN 1 END) as rapid_count
+                FROM pair_tx
+            ),
+            rounds AS (
+                SELECT COUNT(*) as round_count
+                FROM transfers
+                WHERE from_address = :from_addr AND to_address = :to_addr
+                AND (""" + _ROUND_LEVEL_SQL + """) > 0
+            ),
+            nights AS (
+                SELECT COUNT(*) as unusual_count
+                FROM transfers INDEXED BY idx_tx_night
+                WHERE from_address = :from_addr AND to_address = :to_addr
+                AND CAST(strftime('%H', timestamp) AS INTEGER) BETWEEN 2 AND 5
+            ),
+            common AS (
+                SELECT COUNT(DISTINCT CASE 
+                    WHEN r1.to_address = r2.from_address THEN r1.to_address 
+                    WHEN r1.from_address = r2.to_address THEN r1.from_address 
+                END) as common_connections
+                FROM account_relationships r1, account_relationships r2
+                WHERE r1.from_address = :from_addr 
+                AND r2.to_address = :to_addr
+                AND (r1.to_address = r2.from_address OR r1.from_address = r2.to_address)
+            )
             SELECT 
-                COUNT(*) as total_relationships,
-                SUM(CASE WHEN CAST(total_volume AS REAL) < ? THEN 1 ELSE 0 END) as volume_rank,
-                SUM(CASE WHEN CAST(total_volume AS REAL) / NULLIF(transfer_count, 0) < ? THEN 1 ELSE 0 END) as avg_size_rank
-            FROM account_relationships
-        """, (total_volume, avg_transfer_size))
-        
-        stats = cursor.fetchone()
-        total_rel = max(stats['total_relationships'], 1)
+                rel.volume IS NOT NULL as has_relationship,
+                rel.total_volume,
+                rel.transfer_count,
+                rel.created_epoch,
+                tx.*,
+                rounds.round_count,
+                nights.unusual_count,
+                common.common_connections
+            FROM tx
+            CROSS JOIN rounds
+            CROSS JOIN nights
+            CROSS JOIN common
+            LEFT JOIN rel
+        """, {'from_addr': from_addr, 'to_addr': to_addr, **self._cutoffs()})
+        stats = dict(cursor.fetchone())
+        
+        # Account balances and creation times only matter for an existing
+        # relationship
+        accounts = {}
+        if stats['has_relationship']:
+            cursor.execute("""
+                SELECT address, balance, CAST(strftime('%s', created_at) AS INTEGER) as created_epoch
+                FROM accounts WHERE address IN (?, ?)
+            """, (from_addr, to_addr))
+            accounts = {row['address']: row for row in cursor}
+        sender = accounts.get(from_addr)
+        receiver = accounts.get(to_addr)
+        stats['sender_balance'] = sender['balance'] if sender is not None else None
+        stats['receiver_created_epoch'] = receiver['created_epoch'] if receiver is not None else None
         
-        volume_percentile = stats['volume_rank'] / total_rel
-        avg_size_percentile = stats['avg_size_rank'] / total_rel
+        cursor.execute("""
+            SELECT address, degree_centrality, pagerank
+            FROM account_network_metrics WHERE address IN (?, ?)
+        """, (from_addr, to_addr))
+        metrics = {row['address']: row for row in cursor}
+        from_metrics = metrics.get(from_addr)
+        to_metrics = metrics.get(to_addr)
+        stats['from_degree'] = from_metrics['degree_centrality'] if from_metrics is not None else None
+        stats['to_degree'] = to_metrics['degree_centrality'] if to_metrics is not None else None
+        stats['from_pagerank'] = from_metrics['pagerank'] if from_metrics is not None else None
+        stats['to_pagerank'] = to_metrics['pagerank'] if to_metrics is not None else None
+        
+        return stats
+        
+    def _evaluate(self, stats: Dict) -> Dict:
+        """Run the score kernel on one pair's aggregates
+        
+        Returns the kernel inputs and outputs by name, plus the derived
+        values the detail dicts report.
+        """
+        has_relationship = bool(stats['has_relationship'])
+        has_transfers = stats['tx_count'] > 0
+        transfer_count = stats['transfer_count'] or 0
+        total_volume = float(stats['total_volume'] or 0)
+        sender_balance = float(stats['sender_balance'] or 0)
+        avg_transfer_size = total_volume / max(transfer_count, 1)
         
-        # Calculate components
-        volume_component = min(40, volume_percentile * 40)
-        avg_size_component = min(30, avg_size_percentile * 30)
+        # Percentiles against all relationships
+        volume_percentile = avg_size_percentile = count_percentile = 0.0
+        if has_relationship:
+            self._ensure_percentile_cache()
+            total_rel = max(self._rel_count, 1)
+            volume_percentile = int(np.searchsorted(self._vol_sorted, total_volume)) / total_rel
+            avg_size_percentile = int(np.searchsorted(self._avg_size_sorted, avg_transfer_size)) / total_rel
+            count_percentile = int(np.searchsorted(self._tc_sorted, transfer_count)) / total_rel
+        
+        # Timestamps arrive as epoch seconds; whole days are floored
+        days_active, days_since_last, relationship_days = 1, 0, 0
+        if has_transfers:
+            span_days = (stats['last_epoch'] - stats['first_epoch']) // 86400
+            days_active = max(span_days + 1, 1)
+            days_since_last = int(time.time() - stats['last_epoch']) // 86400
+            relationship_days = span_days + 1
         
-        if sender_balance > 0:
-            relative_volume_component = min(30, (total_volume / sender_balance) * 100)
+        # Check if receiving account is new
+        if stats['receiver_created_epoch'] is not None and stats['created_epoch'] is not None:
+            new_account_flag = 1 if (stats['created_epoch'] - stats['receiver_created_epoch']) // 86400 < 7 else 0
         else:
-            relative_volume_component = 15
-            
-        total_score = volume_component + avg_size_component + relative_volume_component
+            new_account_flag = 0
         
-        details = {
+        inputs = {
+            'has_relationship': has_relationship,
+            'has_transfers': has_transfers,
+            'transfer_count': transfer_count,
             'total_volume': total_volume,
-            'avg_transfer_size': avg_transfer_size,
+            'sender_balance': sender_balance,
             'volume_percentile': volume_percentile,
             'avg_size_percentile': avg_size_percentile,
-            'volume_component': volume_component,
-            'avg_size_component': avg_size_component,
-            'relative_volume_component': relative_volume_component
+            'count_percentile': count_percentile,
+            'days_active': days_active,
+            'unique_days': stats['unique_days'],
+            'days_since_last': days_since_last,
+            'relationship_days': relationship_days,
+            'transfers_last_week': stats['transfers_last_week'],
+            'transfers_last_month': stats['transfers_last_month'],
+            'common_connections': stats['common_connections'] or 0,
+            'from_degree': stats['from_degree'] or 0,
+            'to_degree': stats['to_degree'] or 0,
+            'from_pagerank': stats['from_pagerank'] or 0,
+            'to_pagerank': stats['to_pagerank'] or 0,
+            'rapid_transfers': stats['rapid_count'] or 0,
+            'round_numbers': stats['round_count'] or 0,
+            'unusual_time_transfers': stats['unusual_count'] or 0,
+            'new_account_flag': new_account_flag
         }
         
-        return min(100, total_score), details
-        
-    def calculate_frequency_score(self, from_addr: str, to_addr: str) -> Tuple[float, Dict]:
-        """Calculate frequency-based score (0-100)"""
-        cursor = self.conn.cursor()
-        
-        # Get transfer statistics
-        cursor.execute("""
-            SELECT 
-                ar.transfer_count,
-                MIN(t.timestamp) as first_transfer,
-                MAX(t.timestamp) as last_transfer,
-                COUNT(DISTINCT DATE(t.timestamp)) as unique_days
-            FROM account_relationships ar
-            JOIN transfers t ON ar.from_address = t.from_address AND ar.to_address = t.to_address
-            WHERE ar.from_address = ? AND ar.to_address = ?
-            GROUP BY ar.from_address, ar.to_address
-        """, (from_addr, to_addr))
+        x = np.array([[inputs[name]] for name in _SCORE_INPUTS], dtype=np.float64)
+        values = dict(zip(_SCORE_OUTPUTS, _score_kernel(x)[:, 0].tolist()))
+        values.update(inputs)
+        values['avg_transfer_size'] = avg_transfer_size
+        return values
         
-        row = cursor.fetchone()
-        if not row or row['transfer_count'] == 0:
+    def _volume_result(self, values: Dict) -> Tuple[float, Dict]:
+        if not values['has_relationship']:
             return 0.0, {}
-            
-        transfer_count = row['transfer_count']
-        first_transfer = datetime.fromisoformat(row['first_transfer'])
-        last_transfer = datetime.fromisoformat(row['last_transfer'])
-        unique_days = row['unique_days']
-        
-        # Calculate days active
-        days_active = max((last_transfer - first_transfer).days + 1, 1)
-        transfers_per_day = transfer_count / days_active
-        
-        # Get percentiles
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN transfer_count < ? THEN 1 ELSE 0 END) as count_rank
-            FROM account_relationships
-        """, (transfer_count,))
-        
-        stats = cursor.fetchone()
-        total_rel = max(stats['total'], 1)
-        count_percentile = stats['count_rank'] / total_rel
-        
-        # Calculate frequency percentile (simplified)
-        frequency_percentile = min(1.0, transfers_per_day / 10)  # Assume 10 transfers/day is 100th percentile
-        
-        # Calculate components
-        count_component = min(40, count_percentile * 40)
-        frequency_component = min(30, frequency_percentile * 30)
-        consistency_component = min(30, (unique_days / days_active) * 30)
-        
-        total_score = count_component + frequency_component + consistency_component
         
         details = {
-            'transfer_count': transfer_count,
-            'days_active': days_active,
-            'transfers_per_day': transfers_per_day,
-            'unique_days': unique_days,
-            'count_percentile': count_percentile,
-            'frequency_percentile': frequency_percentile,
-            'count_component': count_component,
-            'frequency_component': frequency_component,
-            'consistency_component': consistency_component
+            'total_volume': values['total_volume'],
+            'avg_transfer_size': values['avg_transfer_size'],
+            'volume_percentile': values['volume_percentile'],
+            'avg_size_percentile': values['avg_size_percentile'],
+            'volume_component': values['volume_component'],
+            'avg_size_component': values['avg_size_component'],
+            'relative_volume_component': values['relative_volume_component']
         }
         
-        return min(100, total_score), details
-        
-    def calculate_temporal_score(self, from_addr: str, to_addr: str) -> Tuple[float, Dict]:
-        """Calculate temporal score (0-100)"""
-        cursor = self.conn.cursor()
-        
-        # Get temporal data
-        cursor.execute("""
-            SELECT 
-                ar.transfer_count,
-                MIN(t.timestamp) as first_transfer,
-                MAX(t.timestamp) as last_transfer,
-                COUNT(CASE WHEN datetime(t.timestamp) >= datetime('now', '-7 days') THEN 1 END) as transfers_last_week,
-                COUNT(CASE WHEN datetime(t.timestamp) >= datetime('now', '-30 days') THEN 1 END) as transfers_last_month
-            FROM account_relationships ar
-            JOIN transfers t ON ar.from_address = t.from_address AND ar.to_address = t.to_address
-            WHERE ar.from_address = ? AND ar.to_address = ?
-            GROUP BY ar.from_address, ar.to_address
-        """, (from_addr, to_addr))
+        return values['volume_score'], details
         
-        row = cursor.fetchone()
-        if not row:
+    def _frequency_result(self, values: Dict) -> Tuple[float, Dict]:
+        if not values['has_relationship'] or not values['has_transfers'] or values['transfer_count'] == 0:
             return 0.0, {}
-            
-        last_transfer = datetime.fromisoformat(row['last_transfer'])
-        first_transfer = datetime.fromisoformat(row['first_transfer'])
-        days_since_last = (datetime.now() - last_transfer).days
-        relationship_days = (last_transfer - first_transfer).days + 1
-        
-        # Recency component (exponential decay)
-        if days_since_last <= 1:
-            recency_component = 40
-        elif days_since_last <= 7:
-            recency_component = 35
-        elif days_since_last <= 30:
-            recency_component = 25
-        elif days_since_last <= 90:
-            recency_component = 15
-        elif days_since_last <= 365:
-            recency_component = 5
-        else:
-            recency_component = 0
-            
-        # Duration component
-        duration_component = min(30, (relationship_days / 365) * 30)
-        
-        # Activity pattern component
-        if row['transfer_count'] > 0:
-            recent_week_ratio = row['transfers_last_week'] / row['transfer_count']
-            recent_month_ratio = row['transfers_last_month'] / row['transfer_count']
-            activity_component = min(30, recent_week_ratio * 15 + recent_month_ratio * 15)
-        else:
-            activity_component = 0
-            
-        total_score = recency_component + duration_component + activity_component
         
         details = {
-            'days_since_last': days_since_last,
-            'relationship_days': relationship_days,
-            'transfers_last_week': row['transfers_last_week'],
-            'transfers_last_month': row['transfers_last_month'],
-            'recency_component': recency_component,
-            'duration_component': duration_component,
-            'activity_component': activity_component
+            'transfer_count': values['transfer_count'],
+            'days_active': values['days_active'],
+            'transfers_per_day': values['transfers_per_day'],
+            'unique_days': values['unique_days'],
+            'count_percentile': values['count_percentile'],
+            'frequency_percentile': values['frequency_percentile'],
+            'count_component': values['count_component'],
+            'frequency_component': values['frequency_component'],
+            'consistency_component': values['consistency_component']
         }
         
-        return total_score, details
-        
-    def calculate_network_score(self, from_addr: str, to_addr: str) -> Tuple[float, Dict]:
-        """Calculate network-based score (0-100)"""
-        cursor = self.conn.cursor()
-        
-        # Get common connections
-        cursor.execute("""
-            SELECT COUNT(DISTINCT CASE 
-                WHEN r1.to_address = r2.from_address THEN r1.to_address 
-                WHEN r1.from_address = r2.to_address THEN r1.from_address 
-            END) as common_connections
-            FROM account_relationships r1, account_relationships r2
-            WHERE r1.from_address = ? 
-            AND r2.to_address = ?
-            AND (r1.to_address = r2.from_address OR r1.from_address = r2.to_address)
-        """, (from_addr, to_addr))
+        return values['frequency_score'], details
         
-        common_connections = cursor.fetchone()['common_connections'] or 0
+    def _temporal_result(self, values: Dict) -> Tuple[float, Dict]:
+        if not values['has_relationship'] or not values['has_transfers']:
+            return 0.0, {}
         
-        # Get network metrics (if available)
-        cursor.execute("""
-            SELECT 
-                nm1.degree_centrality as from_degree,
-                nm2.degree_centrality as to_degree,
-                nm1.pagerank as from_pagerank,
-                nm2.pagerank as to_pagerank
-            FROM (SELECT ?) as f
-            LEFT JOIN account_network_metrics nm1 ON f.? = nm1.address
-            LEFT JOIN account_network_metrics nm2 ON ? = nm2.address
-        """, (from_addr, from_addr, to_addr))
+        details = {
+            'days_since_last': values['days_since_last'],
+            'relationship_days': values['relationship_days'],
+            'transfers_last_week': values['transfers_last_week'],
+            'transfers_last_month': values['transfers_last_month'],
+            'recency_component': values['recency_component'],
+            'duration_component': values['duration_component'],
+            'activity_component': values['activity_component']
+        }
         
-        metrics = cursor.fetchone()
+        return values['temporal_score'], details
         
-        from_degree = metrics['from_degree'] or 0
-        to_degree = metrics['to_degree'] or 0
-        from_pagerank = metrics['from_pagerank'] or 0
-        to_pagerank = metrics['to_pagerank'] or 0
+    def _network_result(self, values: Dict) -> Tuple[float, Dict]:
+        details = {
+            'common_connections': values['common_connections'],
+            'avg_degree_centrality': values['avg_degree_centrality'],
+            'avg_pagerank': values['avg_pagerank'],
+            'common_connections_component': values['common_connections_component'],
+            'centrality_component': values['centrality_component'],
+            'importance_component': values['importance_component']
+        }
         
-        # Calculate components
-        common_connections_component = min(40, common_connections * 5)
-        centrality_component = min(30, ((from_degree + to_degree) / 2) * 100)
-        importance_component = min(30, ((from_pagerank + to_pagerank) / 2) * 1000)
+        return values['network_score'], details
         
-        total_score = common_connections_component + centrality_component + importance_component
+    def _risk_result(self, values: Dict) -> Tuple[float, Dict]:
+        if not values['has_relationship']:
+            return 0.0, {}
         
         details = {
-            'common_connections': common_connections,
-            'avg_degree_centrality': (from_degree + to_degree) / 2,
-            'avg_pagerank': (from_pagerank + to_pagerank) / 2,
-            'common_connections_component': common_connections_component,
-            'centrality_component': centrality_component,
-            'importance_component': importance_component
+            'rapid_transfers': values['rapid_transfers'],
+            'round_numbers': values['round_numbers'],
+            'unusual_time_transfers': values['unusual_time_transfers'],
+            'new_account_interaction': bool(values['new_account_flag']),
+            'rapid_transfer_risk': values['rapid_transfer_risk'],
+            'round_number_risk': values['round_number_risk'],
+            'time_anomaly_risk': values['time_anomaly_risk'],
+            'new_account_risk': values['new_account_risk']
         }
         
-        return min(100, total_score), details
+        return values['risk_score'], details
         
-    def calculate_risk_score(self, from_addr: str, to_addr: str) -> Tuple[float, Dict]:
-        """Calculate risk indicators (0-100, higher = more risky)"""
-        cursor = self.conn.cursor()
+    def calculate_volume_score(self, from_addr: str, to_addr: str,
+                               stats: Optional[Dict] = None) -> Tuple[float, Dict]:
+        """Calculate volume-based score (0-100)"""
+        if stats is None:
+            stats = self._fetch_pair_stats(from_addr, to_addr)
+        return self._volume_result(self._evaluate(stats))
         
-        # Get transfer count
-        cursor.execute("""
-            SELECT transfer_count, created_at
-            FROM account_relationships
-            WHERE from_address = ? AND to_address = ?
-        """, (from_addr, to_addr))
+    def calculate_frequency_score(self, from_addr: str, to_addr: str,
+                                  stats: Optional[Dict] = None) -> Tuple[float, Dict]:
+        """Calculate frequency-based score (0-100)"""
+        if stats is None:
+            stats = self._fetch_pair_stats(from_addr, to_addr)
+        return self._frequency_result(self._evaluate(stats))
         
-        rel_data = cursor.fetchone()
-        if not rel_data:
-            return 0.0, {}
-            
-        transfer_count = rel_data['transfer_count']
+    def calculate_temporal_score(self, from_addr: str, to_addr: str,
+                                 stats: Optional[Dict] = None) -> Tuple[float, Dict]:
+        """Calculate temporal score (0-100)"""
+        if stats is None:
+            stats = self._fetch_pair_stats(from_addr, to_addr)
+        return self._temporal_result(self._evaluate(stats))
         
-        # Check rapid sequential transfers
-        cursor.execute("""
-            SELECT COUNT(*) as rapid_count
-            FROM transfers t1
-            JOIN transfers t2 ON t1.to_address = t2.from_address
-            WHERE t1.from_address = ?
-            AND t2.to_address = ?
-            AND ABS(julianday(t2.timestamp) - julianday(t1.timestamp)) * 24 * 60 < 5
-        """, (from_addr, to_addr))
+    def calculate_network_score(self, from_addr: str, to_addr: str,
+                                stats: Optional[Dict] = None) -> Tuple[float, Dict]:
+        """Calculate network-based score (0-100)"""
+        if stats is None:
+            stats = self._fetch_pair_stats(from_addr, to_addr)
+        return self._network_result(self._evaluate(stats))
         
-        rapid_transfers = cursor.fetchone()['rapid_count'] or 0
+    def calculate_risk_score(self, from_addr: str, to_addr: str,
+                             stats: Optional[Dict] = None) -> Tuple[float, Dict]:
+        """Calculate risk indicators (0-100, higher = more risky)"""
+        if stats is None:
+            stats = self._fetch_pair_stats(from_addr, to_addr)
+        return self._risk_result(self._evaluate(stats))
         
-        # Check round numbers (amounts divisible by DOT units)
-        cursor.execute("""
-            SELECT COUNT(*) as round_count
-            FROM transfers
-            WHERE from_address = ? AND to_address = ?
-            AND (
-                CAST(value AS REAL) % 1000000000000 = 0 OR
-                CAST(value AS REAL) % 10000000000000 = 0 OR
-                CAST(value AS REAL) % 100000000000000 = 0
-            )
-        """, (from_addr, to_addr))
+    def _score_generation(self) -> int:
+        """Current generation of the scoring inputs"""
+        return self._conn().execute(
+            "SELECT generation FROM relationship_score_state WHERE id = 1"
+        ).fetchone()[0]
         
-        round_numbers = cursor.fetchone()['round_count'] or 0
+    def _load_score(self, from_addr: str, to_addr: str) -> Optional[RelationshipScore]:
+        """Return the persisted score if it is clean, current and within its TTL"""
+        now_ts = int(time.time())
+        cursor = self._conn().cursor()
         
-        # Check unusual time transfers
         cursor.execute("""
-            SELECT COUNT(*) as unusual_count
-            FROM transfers
-            WHERE from_address = ? AND to_address = ?
-            AND CAST(strftime('%H', timestamp) AS INTEGER) BETWEEN 2 AND 5
-        """, (from_addr, to_addr))
-        
-        unusual_time = cursor.fetchone()['unusual_count'] or 0
+            SELECT 
+                volume_score,
+                frequency_score,
+                temporal_score,
+                network_score,
+                risk_score,
+                total_score,
+                score_details
+            FROM account_relationships ar
+            WHERE ar.from_address = :from_addr AND ar.to_address = :to_addr
+            AND ar.score_dirty = 0
+            AND ar.score_details IS NOT NULL
+            AND ar.score_generation = (SELECT generation FROM relationship_score_state WHERE id = 1)
+            AND CAST(strftime('%s', ar.score_updated_at) AS INTEGER) >= :now_ts - CASE
+                WHEN (
+                    SELECT CAST(strftime('%s', MAX(t.timestamp)) AS INTEGER)
+                    FROM transfers t
+                    WHERE t.from_address = ar.from_address AND t.to_address = ar.to_address
+                ) >= :week_ts THEN :ttl_active
+                ELSE :ttl_idle
+            END
+        """, {
+            'from_addr': from_addr,
+            'to_addr': to_addr,
+            'now_ts': now_ts,
+            'week_ts': now_ts - 7 * 86400,
+            'ttl_active': SCORE_TTL_ACTIVE,
+            'ttl_idle': SCORE_TTL_IDLE
+        })
         
-        # Check if receiving account is new
-        cursor.execute("""
-            SELECT created_at
-            FROM accounts
-            WHERE address = ?
-        """, (to_addr,))
-        
-        account_data = cursor.fetchone()
-        if account_data and rel_data['created_at']:
-            rel_created = datetime.fromisoformat(rel_data['created_at'])
-            acc_created = datetime.fromisoformat(account_data['created_at'])
-            new_account_flag = 1 if (rel_created - acc_created).days < 7 else 0
-        else:
-            new_account_flag = 0
+        row = cursor.fetchone()
+        if row is None:
+            return None
             
-        # Calculate risk components
-        rapid_transfer_risk = min(30, (rapid_transfers / max(transfer_count, 1)) * 100)
-        round_number_risk = min(25, (round_numbers / max(transfer_count, 1)) * 50)
-        time_anomaly_risk = min(25, (unusual_time / max(transfer_count, 1)) * 50)
-        new_account_risk = new_account_flag * 20
-        
-        total_risk = rapid_transfer_risk + round_number_risk + time_anomaly_risk + new_account_risk
-        
-        details = {
-            'rapid_transfers': rapid_transfers,
-            'round_numbers': round_numbers,
-            'unusual_time_transfers': unusual_time,
-            'new_account_interaction': bool(new_account_flag),
-            'rapid_transfer_risk': rapid_transfer_risk,
-            'round_number_risk': round_number_risk,
-            'time_anomaly_risk': time_anomaly_risk,
-            'new_account_risk': new_account_risk
-        }
-        
-        return min(100, total_risk), details
-        
-    def calculate_total_score(self, from_addr: str, to_addr: str) -> RelationshipScore:
-        """Calculate the total relationship strength score"""
-        
-        # Calculate all component scores
-        volume_score, volume_details = self.calculate_volume_score(from_addr, to_addr)
-        frequency_score, frequency_details = self.calculate_frequency_score(from_addr, to_addr)
-        temporal_score, temporal_details = self.calculate_temporal_score(from_addr, to_addr)
-        network_score, network_details = self.calculate_network_score(from_addr, to_addr)
-        risk_score, risk_details = self.calculate_risk_score(from_addr, to_addr)
+        return RelationshipScore(
+            from_address=from_addr,
+            to_address=to_addr,
+            volume_score=row['volume_score'],
+            frequency_score=row['frequency_score'],
+            temporal_score=row['temporal_score'],
+            network_score=row['network_score'],
+            risk_score=row['risk_score'],
+            total_score=row['total_score'],
+            details=orjson.loads(row['score_details']) if orjson is not None else json.loads(row['score_details'])
+        )
         
-        # Apply weights and risk penalty
+    def _store_score(self, score: RelationshipScore, generation: int):
+        """Persist a freshly computed score and mark the relationship clean
+        
+        generation must be read before the score's inputs were, so a change
+        made while scoring leaves the stored score stale.
+        """
+        details = orjson.dumps(score.details).decode() if orjson is not None else json.dumps(score.details)
+        self.conn.execute("""
+            UPDATE account_relationships
+            SET volume_score = ?, frequency_score = ?, temporal_score = ?,
+                network_score = ?, risk_score = ?, total_score = ?,
+                score_details = ?, score_generation = ?,
+                score_updated_at = CURRENT_TIMESTAMP, score_dirty = 0
+            WHERE from_address = ? AND to_address = ?
+        """, (
+            score.volume_score, score.frequency_score, score.temporal_score,
+            score.network_score, score.risk_score, score.total_score,
+            details, generation,
+            score.from_address, score.to_address
+        ))
+        
+    def calculate_total_score(self, from_addr: str, to_addr: str, use_cache: bool = False) -> RelationshipScore:
+        """Calculate the total relationship strength score
+        
+        With use_cache, a persisted score is returned while no transfer has
+        landed on the pair, no other scoring input has changed and it is
+        within its TTL; otherwise the fresh score is persisted. Without it
+        the pair is always scored from the data and nothing is written.
+        """
+        if use_cache:
+            self._ensure_score_cache_schema()
+            version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            score = self._memo_total_score(from_addr, to_addr, int(time.time()) // 3600, version)
+            # The memo holds one instance per key; callers get their own copy
+            return replace(score, details=copy.deepcopy(score.details))
+        return self._compute_total_score(from_addr, to_addr)
+        
+    def _cached_total_score(self, from_addr: str, to_addr: str, hour: int, data_version: int) -> RelationshipScore:
+        """Persisted score if still valid, otherwise a fresh one that is then
+        persisted (hour and data_version only key the memo)"""
+        generation = self._score_generation()
+        cached = self._load_score(from_addr, to_addr)
+        if cached is not None:
+            return cached
+        score = self._compute_total_score(from_addr, to_addr)
+        self._store_score(score, generation)
+        return score
+        
+    def _compute_total_score(self, from_addr: str, to_addr: str) -> RelationshipScore:
+        """Score a pair from the transfer data"""
+        values = self._evaluate(self._fetch_pair_stats(from_addr, to_addr))
+        
+        # All component scores come from the same kernel run
+        volume_score, volume_details = self._volume_result(values)
+        frequency_score, frequency_details = self._frequency_result(values)
+        temporal_score, temporal_details = self._temporal_result(values)
+        network_score, network_details = self._network_result(values)
+        risk_score, risk_details = self._risk_result(values)
+        
+        # Weights used by _score_kernel
         weights = {
             'volume': 0.25,
             'frequency': 0.25,
@@ -399,17 +795,6 @@ class RelationshipScorer:
             'network': 0.30
         }
         
-        base_score = (
-            volume_score * weights['volume'] +
-            frequency_score * weights['frequency'] +
-            temporal_score * weights['temporal'] +
-            network_score * weights['network']
-        )
-        
-        # Apply risk penalty (max 50% reduction)
-        risk_multiplier = 1 - (risk_score / 200)
-        total_score = round(base_score * risk_multiplier, 2)
-        
         # Compile all details
         all_details = {
             'volume': volume_details,
@@ -418,11 +803,11 @@ class RelationshipScorer:
             'network': network_details,
             'risk': risk_details,
             'weights': weights,
-            'base_score': base_score,
-            'risk_multiplier': risk_multiplier
+            'base_score': values['base_score'],
+            'risk_multiplier': values['risk_multiplier']
         }
         
-        return RelationshipScore(
+        score = RelationshipScore(
             from_address=from_addr,
             to_address=to_addr,
             volume_score=volume_score,
@@ -430,30 +815,206 @@ class RelationshipScorer:
             temporal_score=temporal_score,
             network_score=network_score,
             risk_score=risk_score,
-            total_score=total_score,
+            total_score=round(values['total_score'], 2),
             details=all_details
         )
         
-    def update_network_metrics(self):
-        """Update network centrality metrics for all accounts"""
-        cursor = self.conn.cursor()
+        return score
         
-        # Build network graph
-        G = nx.DiGraph()
+    def score_many(self, pairs: List[Tuple[str, str]]) -> pd.DataFrame:
+        """Score many relationships with one query and one kernel run
+        
+        Returns one row per distinct (from_address, to_address) pair, in input
+        order, with the component and total scores calculate_total_score
+        gives for that pair, as float32.
+        """
+        conn = self._conn()
+        cursor = conn.cursor()
         
-        # Get all relationships
         cursor.execute("""
-            SELECT from_address, to_address, total_volume, transfer_count
-            FROM account_relationships
+            CREATE TEMP TABLE IF NOT EXISTS tmp_pairs (
+                from_address TEXT NOT NULL,
+                to_address TEXT NOT NULL,
+                PRIMARY KEY (from_address, to_address)
+            )
         """)
-        
-        for row in cursor.fetchall():
-            G.add_edge(
-                row['from_address'], 
-                row['to_address'],
-                weight=float(row['total_volume']),
-                transfers=row['transfer_count']
+        cursor.execute("DELETE FROM tmp_pairs")
+        cursor.executemany("INSERT OR IGNORE INTO tmp_pairs VALUES (?, ?)", pairs)
+        
+        df = pd.read_sql_query("""
+            WITH pair_ts AS (
+                -- CROSS JOIN pins tmp_pairs as the outer loop, so transfers
+                -- are read with one index seek per requested pair
+                SELECT 
+                    t.from_address,
+                    t.to_address,
+                    t.timestamp,
+                    CAST(strftime('%s', t.timestamp) AS INTEGER) as ts
+                FROM tmp_pairs p
+                CROSS JOIN transfers t
+                WHERE t.from_address = p.from_address AND t.to_address = p.to_address
+            ),
+            pair_tx AS (
+                SELECT 
+                    *,
+                    ts - LAG(ts) OVER (
+                        PARTITION BY from_address, to_address ORDER BY timestamp
+                    ) as gap
+                FROM pair_ts
+            ),
+            tx AS (
+                SELECT 
+                    from_address,
+                    to_address,
+                    COUNT(*) as tx_count,
+                    MIN(ts) as first_epoch,
+                    MAX(ts) as last_epoch,
+                    COUNT(DISTINCT ts / 86400) as unique_days,
+                    COUNT(CASE WHEN ts >= :week_ts THEN 1 END) as transfers_last_week,
+                    COUNT(CASE WHEN ts >= :month_ts THEN 1 END) as transfers_last_month,
+                    COUNT(CASE WHEN gap < 300 THEN 1 END) as rapid_count
+                FROM pair_tx
+                GROUP BY from_address, to_address
+            ),
+            rounds AS (
+                SELECT p.from_address, p.to_address, COUNT(*) as round_count
+                FROM tmp_pairs p
+                JOIN transfers t ON t.from_address = p.from_address AND t.to_address = p.to_address
+                WHERE (""" + _ROUND_LEVEL_SQL + """) > 0
+                GROUP BY p.from_address, p.to_address
+            ),
+            nights AS (
+                SELECT p.from_address, p.to_address, COUNT(*) as unusual_count
+                FROM tmp_pairs p
+                JOIN transfers t INDEXED BY idx_tx_night
+                    ON t.from_address = p.from_address AND t.to_address = p.to_address
+                WHERE CAST(strftime('%H', t.timestamp) AS INTEGER) BETWEEN 2 AND 5
+                GROUP BY p.from_address, p.to_address
+            ),
+            common AS (
+                SELECT 
+                    p.from_address,
+                    p.to_address,
+                    COUNT(DISTINCT CASE 
+                        WHEN r1.to_address = r2.from_address THEN r1.to_address 
+                        WHEN r1.from_address = r2.to_address THEN r1.from_address 
+                    END) as common_connections
+                FROM tmp_pairs p
+                JOIN account_relationships r1 ON r1.from_address = p.from_address
+                JOIN account_relationships r2 ON r2.to_address = p.to_address
+                    AND (r1.to_address = r2.from_address OR r1.from_address = r2.to_address)
+                GROUP BY p.from_address, p.to_address
             )
+            SELECT 
+                p.from_address,
+                p.to_address,
+                ar.from_address IS NOT NULL as has_relationship,
+                ar.total_volume,
+                ar.transfer_count,
+                CAST(strftime('%s', ar.created_at) AS INTEGER) as created_epoch,
+                a1.balance as sender_balance,
+                CAST(strftime('%s', a2.created_at) AS INTEGER) as receiver_created_epoch,
+                tx.tx_count,
+                tx.first_epoch,
+                tx.last_epoch,
+                tx.unique_days,
+                tx.transfers_last_week,
+                tx.transfers_last_month,
+                nights.unusual_count,
+                tx.rapid_count,
+                rounds.round_count,
+                common.common_connections,
+                nm1.degree_centrality as from_degree,
+                nm2.degree_centrality as to_degree,
+                nm1.pagerank as from_pagerank,
+                nm2.pagerank as to_pagerank
+            FROM tmp_pairs p
+            LEFT JOIN account_relationships ar 
+                ON ar.from_address = p.from_address AND ar.to_address = p.to_address
+            LEFT JOIN accounts a1 ON ar.from_address = a1.address
+            LEFT JOIN accounts a2 ON ar.to_address = a2.address
+            LEFT JOIN tx ON tx.from_address = p.from_address AND tx.to_address = p.to_address
+            LEFT JOIN rounds ON rounds.from_address = p.from_address AND rounds.to_address = p.to_address
+            LEFT JOIN nights ON nights.from_address = p.from_address AND nights.to_address = p.to_address
+            LEFT JOIN common ON common.from_address = p.from_address AND common.to_address = p.to_address
+            LEFT JOIN account_network_metrics nm1 ON nm1.address = p.from_address
+            LEFT JOIN account_network_metrics nm2 ON nm2.address = p.to_address
+            ORDER BY p.rowid
+        """, conn, params=self._cutoffs())
+        
+        has_relationship = df['has_relationship'].to_numpy(dtype=bool)
+        has_transfers = df['tx_count'].fillna(0).to_numpy() > 0
+        transfer_count = df['transfer_count'].fillna(0).to_numpy(dtype=np.float64)
+        total_volume = pd.to_numeric(df['total_volume'], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+        avg_transfer_size = total_volume / np.maximum(transfer_count, 1)
+        
+        # Percentiles against all relationships
+        self._ensure_percentile_cache()
+        total_rel = max(self._rel_count, 1)
+        volume_percentile = np.searchsorted(self._vol_sorted, total_volume) / total_rel
+        avg_size_percentile = np.searchsorted(self._avg_size_sorted, avg_transfer_size) / total_rel
+        count_percentile = np.searchsorted(self._tc_sorted, transfer_count) / total_rel
+        
+        first_epoch = df['first_epoch'].to_numpy(dtype=np.float64)
+        last_epoch = df['last_epoch'].to_numpy(dtype=np.float64)
+        span_days = np.nan_to_num((last_epoch - first_epoch) // 86400)
+        days_since_last = np.nan_to_num((int(time.time()) - last_epoch) // 86400)
+        
+        # Receiving account created within a week of the relationship
+        created_gap = df['created_epoch'].to_numpy(dtype=np.float64) - df['receiver_created_epoch'].to_numpy(dtype=np.float64)
+        new_account_flag = (created_gap // 86400 < 7).astype(np.float64)
+        
+        inputs = {
+            'has_relationship': has_relationship,
+            'has_transfers': has_transfers,
+            'transfer_count': transfer_count,
+            'total_volume': total_volume,
+            'sender_balance': pd.to_numeric(df['sender_balance'], errors='coerce').fillna(0).to_numpy(),
+            'volume_percentile': np.where(has_relationship, volume_percentile, 0.0),
+            'avg_size_percentile': np.where(has_relationship, avg_size_percentile, 0.0),
+            'count_percentile': np.where(has_relationship, count_percentile, 0.0),
+            'days_active': np.where(has_transfers, np.maximum(span_days + 1, 1), 1),
+            'unique_days': df['unique_days'].fillna(0).to_numpy(),
+            'days_since_last': days_since_last,
+            'relationship_days': np.where(has_transfers, span_days + 1, 0),
+            'transfers_last_week': df['transfers_last_week'].fillna(0).to_numpy(),
+            'transfers_last_month': df['transfers_last_month'].fillna(0).to_numpy(),
+            'common_connections': df['common_connections'].fillna(0).to_numpy(),
+            'from_degree': df['from_degree'].fillna(0).to_numpy(),
+            'to_degree': df['to_degree'].fillna(0).to_numpy(),
+            'from_pagerank': df['from_pagerank'].fillna(0).to_numpy(),
+            'to_pagerank': df['to_pagerank'].fillna(0).to_numpy(),
+            'rapid_transfers': df['rapid_count'].fillna(0).to_numpy(),
+            'round_numbers': df['round_count'].fillna(0).to_numpy(),
+            'unusual_time_transfers': df['unusual_count'].fillna(0).to_numpy(),
+            'new_account_flag': new_account_flag
+        }
+        
+        x = np.empty((len(_SCORE_INPUTS), len(df)))
+        for i, name in enumerate(_SCORE_INPUTS):
+            x[i] = inputs[name]
+        out = dict(zip(_SCORE_OUTPUTS, _score_kernel(x)))
+        
+        # Scores are bounded to 0-100, so float32 keeps well under the
+        # reported two decimals while halving the frame's score columns
+        return pd.DataFrame({
+            'from_address': df['from_address'],
+            'to_address': df['to_address'],
+            'volume_score': out['volume_score'].astype(np.float32),
+            'frequency_score': out['frequency_score'].astype(np.float32),
+            'temporal_score': out['temporal_score'].astype(np.float32),
+            'network_score': out['network_score'].astype(np.float32),
+            'risk_score': out['risk_score'].astype(np.float32),
+            'total_score': np.array([round(score, 2) for score in out['total_score'].tolist()], dtype=np.float32)
+        })
+        
+    def _networkx_metrics(self, nodes: np.ndarray, src: np.ndarray, dst: np.ndarray,
+                          weights: np.ndarray) -> List[np.ndarray]:
+        """Centrality metrics computed with networkx"""
+        # Build network graph
+        G = nx.DiGraph()
+        G.add_nodes_from(nodes.tolist())
+        G.add_weighted_edges_from(zip(nodes[src].tolist(), nodes[dst].tolist(), weights.tolist()))
             
         # Calculate centrality metrics
         degree_centrality = nx.degree_centrality(G)
@@ -465,36 +1026,122 @@ class RelationshipScorer:
         G_undirected = G.to_undirected()
         clustering = nx.clustering(G_undirected, weight='weight')
         
-        # Update database
-        for node in G.nodes():
-            # Calculate average common neighbors
-            neighbors = set(G.neighbors(node)) | set(G.predecessors(node))
-            common_neighbors_counts = []
-            
-            for neighbor in neighbors:
-                neighbor_neighbors = set(G.neighbors(neighbor)) | set(G.predecessors(neighbor))
-                common = len(neighbors & neighbor_neighbors)
-                common_neighbors_counts.append(common)
-                
-            avg_common = np.mean(common_neighbors_counts) if common_neighbors_counts else 0
+        return [
+            np.array([metric.get(node, 0) for node in G], dtype=np.float64)
+            for metric in (degree_centrality, betweenness_centrality, closeness_centrality,
+                           clustering, pagerank)
+        ]
+        
+    def _igraph_metrics(self, nodes: np.ndarray, src: np.ndarray, dst: np.ndarray,
+                        weights: np.ndarray, A: sp.csr_array) -> List[np.ndarray]:
+        """Centrality metrics computed with igraph, scaled to networkx's conventions"""
+        n = len(nodes)
+        g = ig.Graph(n=n, edges=np.column_stack([src, dst]).tolist(), directed=True,
+                     edge_attrs={'weight': weights.tolist()})
+        
+        # networkx normalises degree by n - 1 and directed betweenness by
+        # (n - 1)(n - 2)
+        degree_centrality = np.array(g.degree(), dtype=np.float64) / max(n - 1, 1)
+        betweenness_centrality = np.array(g.betweenness(directed=True, weights='weight'), dtype=np.float64)
+        if n > 2:
+            betweenness_centrality /= (n - 1) * (n - 2)
+        
+        # Closeness over incoming distances, scaled by the reachable share of
+        # the graph as networkx's wf_improved does
+        closeness = np.nan_to_num(np.array(g.closeness(mode='in', weights='weight'), dtype=np.float64))
+        reachable = np.array([len(g.subcomponent(v, mode='in')) - 1 for v in range(n)], dtype=np.float64)
+        closeness_centrality = closeness * reachable / max(n - 1, 1)
+        
+        pagerank = np.array(g.pagerank(directed=True, weights='weight'), dtype=np.float64)
+        
+        # igraph's weighted transitivity is Barrat's; networkx's is Onnela's
+        # geometric mean of normalised triangle weights, taken here from the
+        # cube roots W: the triangles through u sum to (W @ W * W)[u, :].
+        # As in networkx's to_undirected, a reciprocated pair keeps the weight
+        # of the edge out of the later node (the lower triangle).
+        off_diagonal = src != dst
+        D = sp.csr_array(
+            (weights[off_diagonal], (src[off_diagonal], dst[off_diagonal])),
+            shape=(n, n)
+        )
+        later = sp.tril(D, k=-1, format='csr')
+        earlier = sp.csr_array(sp.triu(D, k=1).T)
+        earlier = earlier - earlier.multiply(later > 0)
+        earlier.eliminate_zeros()
+        W = later + earlier
+        W = W + W.T
+        U = sp.csr_array((A + A.T) > 0, dtype=np.int64)
+        U.setdiag(0)
+        U.eliminate_zeros()
+        max_weight = W.max() if W.nnz else 0
+        if max_weight > 0:
+            W = W / max_weight
+        W = W.power(1 / 3)
+        triangles = np.asarray(((W @ W) * W).sum(axis=1)).ravel()
+        degree = np.asarray(U.sum(axis=1)).ravel()
+        clustering = np.divide(
+            triangles, degree * (degree - 1),
+            out=np.zeros(n), where=degree > 1
+        )
+        return [degree_centrality, betweenness_centrality, closeness_centrality, clustering, pagerank]
+        
+    def update_network_metrics(self):
+        """Update network centrality metrics for all accounts"""
+        cursor = self.conn.cursor()
+        
+        # Get all relationships as columns and index the addresses in order
+        # of first appearance (from, to, from, to, ...), the order networkx
+        # would add them as nodes
+        df = pd.read_sql_query("""
+            SELECT from_address, to_address, total_volume
+            FROM account_relationships
+        """, self.conn)
+        codes, nodes = pd.factorize(
+            np.column_stack([df['from_address'].to_numpy(), df['to_address'].to_numpy()]).ravel()
+        )
+        nodes = np.asarray(nodes, dtype=object)
+        src, dst = codes[0::2], codes[1::2]
+        weights = pd.to_numeric(df['total_volume'], errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+        n = len(nodes)
+        
+        # Unweighted adjacency, shared by the igraph path and the common
+        # neighbor average
+        A = sp.csr_array((np.ones(len(src), dtype=np.int64), (src, dst)), shape=(n, n))
+        A.sum_duplicates()
+        
+        # igraph runs the centrality algorithms in C; networkx is the fallback.
+        # igraph rejects non-positive path weights, which relationships with a
+        # zero or unparseable volume have, so those graphs also use networkx
+        if ig is not None and np.all(weights > 0):
+            metrics = self._igraph_metrics(nodes, src, dst, weights, A)
+        else:
+            metrics = self._networkx_metrics(nodes, src, dst, weights)
+        
+        # Average common neighbors over each node's undirected neighborhood:
+        # with U the symmetric adjacency, (U @ U)[i, j] counts the neighbors
+        # i and j share, summed over the neighbors j of i
+        U = sp.csr_array((A + A.T) > 0, dtype=np.int64)
+        common_sums = np.asarray((U * (U @ U)).sum(axis=1)).ravel()
+        degrees = np.asarray(U.sum(axis=1)).ravel()
+        avg_common = np.divide(common_sums, degrees, out=np.zeros(n), where=degrees > 0)
+        
+        # Collect rows for the database
+        rows = list(zip(nodes.tolist(), *(m.tolist() for m in metrics), avg_common.tolist()))
             
-            # Insert or update metrics
-            cursor.execute("""
+        # Write all metrics in one transaction
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.executemany("""
                 INSERT OR REPLACE INTO account_network_metrics
                 (address, degree_centrality, betweenness_centrality, closeness_centrality, 
                  clustering_coefficient, pagerank, common_neighbors_avg, updated_at)
                 VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            """, (
-                node,
-                degree_centrality.get(node, 0),
-                betweenness_centrality.get(node, 0),
-                closeness_centrality.get(node, 0),
-                clustering.get(node, 0),
-                pagerank.get(node, 0),
-                avg_common
-            ))
-            
-        self.conn.commit()
+            """, rows)
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        cursor.execute("COMMIT")
+        self._memo_total_score.cache_clear()
         
     def get_top_relationships(self, limit: int = 100) -> List[Dict]:
         """Get top relationships by total score"""
@@ -537,7 +1184,7 @@ class RelationshipScorer:
         
     def export_scores_to_json(self, from_addr: str, to_addr: str, filepath: str):
         """Export detailed scores to JSON file"""
-        score = self.calculate_total_score(from_addr, to_addr)
+        score = self.calculate_total_score(from_addr, to_addr, use_cache=False)
         
         export_data = {
             'relationship': {
@@ -557,21 +1204,20 @@ class RelationshipScorer:
             'timestamp': datetime.now().isoformat()
         }
         
-        with open(filepath, 'w') as f:
-            json.dump(export_data, f, indent=2)
+        if orjson is not None:
+            with open(filepath, 'wb') as f:
+                f.write(orjson.dumps(export_data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        else:
+            with open(filepath, 'w') as f:
+                json.dump(export_data, f, indent=2)
             
     def _interpret_score(self, score: float) -> str:
         """Interpret the meaning of a score"""
-        if score <= 20:
-            return "Very weak relationship (minimal interaction)"
-        elif score <= 40:
-            return "Weak relationship (occasional interaction)"
-        elif score <= 60:
-            return "Moderate relationship (regular interaction)"
-        elif score <= 80:
-            return "Strong relationship (frequent, consistent interaction)"
-        else:
-            return "Very strong relationship (high volume, frequent, well-connected)"
+        # Bands are closed above: (.., 20], (20, 40], ... (80, ..). NaN fails
+        # every bound, so like +inf it lands in the top band.
+        if not math.isfinite(score):
+            return _interpret_score_band(1 if score < 0 else 5)
+        return _interpret_score_band(min(max(math.ceil(score / 20), 1), 5))
 
 
 # Example usage